@@ -0,0 +1,333 @@
+import asyncio
+import math
+from functools import wraps
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, HttpResponseBase
+from django.utils.translation import gettext as _
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    Throttled,
+    ValidationError,
+)
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import CachedTokenAuthentication
+from .conditional import (
+    not_modified,
+    page_etag,
+    recipe_etag,
+    set_validators,
+)
+from .counts import queryset_count
+from .fast_serializers import FastRecipeSerializer
+from .memberships import MEMBERSHIPS, user_memberships
+from .renderers import FastJSONRenderer
+from .serializers import AuthorWithRecipesSerializer, RecipeSerializer
+from .utils import (
+    COUNT_ESTIMATE_FIELD,
+    PAYLOAD_CACHE_TIMEOUT,
+    SUBSCRIPTIONS_CACHE_TIMEOUT,
+    IngredientFilter,
+    LimitPagination,
+    RecipeFilter,
+    ingredients_cache_key,
+    recipes_with_fields,
+    requested_fields,
+    subscriptions_cache_key,
+    tags_cache_key,
+)
+from core.cache import tiered_cache
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from recipe.models import Ingredient, Recipe, Tag, User
+
+TAG_FIELDS = ('id', 'name', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+
+
+def not_found(model):
+    return NotFound(
+        _('No %s matches the given query.') % model._meta.object_name
+    )
+
+
+def render(data, status=200):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type='application/json'
+    )
+
+
+async def fetch(queryset):
+    return [obj async for obj in queryset]
+
+
+async def cached(key, compute, timeout):
+    return await sync_to_async(tiered_cache.get_or_set)(
+        await sync_to_async(key)(), async_to_sync(compute), timeout
+    )
+
+
+async def authenticate(request):
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != 'token':
+        return AnonymousUser()
+    if len(header) == 1:
+        raise AuthenticationFailed(
+            _('Invalid token header. No credentials provided.')
+        )
+    if len(header) > 2:
+        raise AuthenticationFailed(
+            _('Invalid token header. Token string should not contain spaces.')
+        )
+    user, _token = await sync_to_async(
+        CachedTokenAuthentication().authenticate_credentials
+    )(header[1])
+    return user
+
+
+async def throttle(request, fallback):
+    view = fallback.cls(**fallback.initkwargs)
+    durations = []
+    for throttle_class in view.throttle_classes:
+        throttle = throttle_class()
+        if not await sync_to_async(throttle.allow_request)(request, view):
+            durations.append(throttle.wait())
+    if durations:
+        raise Throttled(max(
+            (duration for duration in durations if duration is not None),
+            default=None
+        ))
+
+
+def async_read_view(fallback):
+    def decorator(handler):
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await sync_to_async(fallback)(
+                    request, *args, **kwargs
+                )
+            try:
+                api_request = Request(request)
+                api_request.user = await authenticate(request)
+                await throttle(api_request, fallback)
+                data = await handler(api_request, *args, **kwargs)
+                if isinstance(data, HttpResponseBase):
+                    return data
+                return render(data)
+            except APIException as exc:
+                detail = exc.detail
+                if not isinstance(detail, (dict, list)):
+                    detail = {'detail': detail}
+                response = render(detail, exc.status_code)
+                if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+                    response['WWW-Authenticate'] = 'Token'
+                if getattr(exc, 'wait', None):
+                    response['Retry-After'] = str(math.ceil(exc.wait))
+                return response
+        return view
+    return decorator
+
+
+async def paginate(request, queryset):
+    page_size = LimitPagination().get_page_size(request)
+    try:
+        page_number = int(request.query_params.get('page', 1))
+    except ValueError:
+        page_number = 0
+    if page_number < 1:
+        raise NotFound(LimitPagination.invalid_page_message)
+    offset = (page_number - 1) * page_size
+    (count, approximate), results = await asyncio.gather(
+        sync_to_async(queryset_count)(queryset, request.user),
+        fetch(queryset[offset:offset + page_size]),
+    )
+    if page_number > 1 and not results:
+        raise NotFound(LimitPagination.invalid_page_message)
+    url = request.build_absolute_uri()
+    previous = None
+    if page_number > 1:
+        previous = (
+            remove_query_param(url, 'page') if page_number == 2
+            else replace_query_param(url, 'page', page_number - 1)
+        )
+    page_info = {
+        'count': count,
+        'next': (
+            replace_query_param(url, 'page', page_number + 1)
+            if offset + page_size < count else None
+        ),
+        'previous': previous,
+    }
+    if approximate:
+        page_info[COUNT_ESTIMATE_FIELD] = True
+    return page_info, results
+
+
+async def membership(user):
+    if user.is_anonymous:
+        return {}
+    relations = list(MEMBERSHIPS)
+    return dict(zip(relations, await asyncio.gather(*(
+        sync_to_async(user_memberships)(user, relation)
+        for relation in relations
+    ))))
+
+
+async def serialize_recipes(request, recipes, many=True, fields=None):
+    context = {
+        'request': request,
+        **await membership(request.user),
+    }
+    return await sync_to_async(
+        lambda: FastRecipeSerializer(
+            recipes, many=many, context=context, fields=fields
+        ).data
+    )()
+
+
+@async_read_view(RecipeViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def recipe_list(request):
+    fields = requested_fields(
+        request.query_params, RecipeSerializer.Meta.fields
+    )
+    filterset = RecipeFilter(
+        request.query_params,
+        queryset=recipes_with_fields(fields),
+        request=request
+    )
+
+    def filter_recipes():
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    page_info, recipes = await paginate(
+        request, await sync_to_async(filter_recipes)()
+    )
+    etag = await sync_to_async(page_etag)(
+        request, recipes, page_info['count'], fields
+    )
+    response = await sync_to_async(not_modified)(request, etag) or render({
+        **page_info,
+        'results': await serialize_recipes(request, recipes, fields=fields),
+    })
+    return set_validators(response, etag)
+
+
+@async_read_view(RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}))
+async def recipe_detail(request, pk):
+    fields = requested_fields(
+        request.query_params, RecipeSerializer.Meta.fields
+    )
+    version = await Recipe.objects.filter(pk=pk).values(
+        'author_id', 'updated_at'
+    ).afirst()
+    if version is None:
+        raise not_found(Recipe)
+    etag = await sync_to_async(recipe_etag)(
+        request, pk, version['author_id'], version['updated_at'], fields
+    )
+    response = await sync_to_async(not_modified)(
+        request, etag, version['updated_at']
+    )
+    if response is None:
+        try:
+            recipe = await recipes_with_fields(fields).aget(pk=pk)
+        except Recipe.DoesNotExist:
+            raise not_found(Recipe)
+        response = render(
+            await serialize_recipes(
+                request, recipe, many=False, fields=fields
+            )
+        )
+    return set_validators(response, etag, version['updated_at'])
+
+
+@async_read_view(TagViewSet.as_view({'get': 'list'}))
+async def tag_list(request):
+    async def tags():
+        return await fetch(Tag.objects.order_by('name').values(*TAG_FIELDS))
+
+    return await cached(tags_cache_key, tags, PAYLOAD_CACHE_TIMEOUT)
+
+
+@async_read_view(TagViewSet.as_view({'get': 'retrieve'}))
+async def tag_detail(request, pk):
+    try:
+        return await Tag.objects.values(*TAG_FIELDS).aget(pk=pk)
+    except Tag.DoesNotExist:
+        raise not_found(Tag)
+
+
+@async_read_view(IngredientViewSet.as_view({'get': 'list'}))
+async def ingredient_list(request):
+    filterset = IngredientFilter(
+        request.query_params,
+        queryset=Ingredient.objects.all(),
+        request=request
+    )
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+
+    async def ingredients():
+        return await fetch(filterset.qs.values(*INGREDIENT_FIELDS))
+
+    return await cached(
+        lambda: ingredients_cache_key(request.query_params),
+        ingredients,
+        PAYLOAD_CACHE_TIMEOUT
+    )
+
+
+@async_read_view(IngredientViewSet.as_view({'get': 'retrieve'}))
+async def ingredient_detail(request, pk):
+    try:
+        return await Ingredient.objects.values(*INGREDIENT_FIELDS).aget(
+            pk=pk
+        )
+    except Ingredient.DoesNotExist:
+        raise not_found(Ingredient)
+
+
+@async_read_view(UserViewSet.as_view(
+    {'get': 'subscriptions'}, **UserViewSet.subscriptions.kwargs
+))
+async def subscription_list(request):
+    if request.user.is_anonymous:
+        raise NotAuthenticated()
+
+    async def subscriptions_page():
+        authors = User.objects.filter(
+            subscriptions_of_authors__user=request.user
+        ).order_by('subscriptions_of_authors__id')
+        page_info, authors = await paginate(request, authors)
+        context = {'request': request, **await membership(request.user)}
+        return {
+            **page_info,
+            'results': await sync_to_async(
+                lambda: AuthorWithRecipesSerializer(
+                    authors, many=True, context=context
+                ).data
+            )(),
+        }
+
+    return await cached(
+        lambda: subscriptions_cache_key(request),
+        subscriptions_page,
+        SUBSCRIPTIONS_CACHE_TIMEOUT
+    )
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.cache import LocalLRUCache
+
+TOKEN_CACHE_KEY = 'auth-token:{}'
+TOKEN_VERSION_KEY = 'auth-token-version'
+
+local_tokens = LocalLRUCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_LOCAL_TTL
+)
+
+
+def shared_tokens():
+    return caches[settings.TOKEN_CACHE]
+
+
+def forget_token(key):
+    local_tokens.delete(key)
+    shared_tokens().delete(TOKEN_CACHE_KEY.format(key))
+    shared_tokens().set(TOKEN_VERSION_KEY, time.time_ns(), None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        version = shared_tokens().get(TOKEN_VERSION_KEY)
+        user, cached_version = local_tokens.get(key, (None, None))
+        if user is None or cached_version != version:
+            user = shared_tokens().get(TOKEN_CACHE_KEY.format(key))
+            if user is None:
+                user, _token = super().authenticate_credentials(key)
+                shared_tokens().set(
+                    TOKEN_CACHE_KEY.format(key), user, settings.TOKEN_CACHE_TTL
+                )
+            local_tokens.set(key, (user, version))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, self.get_model()(key=key, user=user)
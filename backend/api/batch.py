@@ -0,0 +1,75 @@
+import logging
+from urllib.parse import urlsplit
+
+import orjson
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.exceptions import (
+    BadRequest,
+    PermissionDenied,
+    SuspiciousOperation,
+)
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+BODY_HEADERS = ('CONTENT_LENGTH', 'CONTENT_TYPE')
+NOT_FOUND = {'detail': 'Страница не найдена.'}
+FORBIDDEN = {'detail': 'Недостаточно прав.'}
+BAD_REQUEST = {'detail': 'Некорректный запрос.'}
+SERVER_ERROR = {'detail': 'Ошибка сервера.'}
+
+logger = logging.getLogger('django.request')
+
+
+def sub_request(request, method, path):
+    parts = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if key not in BODY_HEADERS
+    }
+    sub.META.update(
+        REQUEST_METHOD=method,
+        PATH_INFO=parts.path,
+        QUERY_STRING=parts.query,
+        HTTP_ACCEPT='application/json',
+    )
+    sub.GET = QueryDict(parts.query)
+    if request.user.is_authenticated:
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def response_body(response):
+    if response.streaming or not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return orjson.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def run_sub_request(request, method, path):
+    sub = sub_request(request, method, path)
+    try:
+        match = resolve(sub.path_info)
+        view = match.func
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+        response = view(sub, *match.args, **match.kwargs)
+    except (Resolver404, Http404):
+        return {'status': 404, 'body': NOT_FOUND}
+    except PermissionDenied:
+        return {'status': 403, 'body': FORBIDDEN}
+    except (BadRequest, SuspiciousOperation):
+        return {'status': 400, 'body': BAD_REQUEST}
+    except Exception:
+        logger.exception('Batch sub-request failed: %s %s', method, path)
+        return {'status': 500, 'body': SERVER_ERROR}
+    if hasattr(response, 'render'):
+        response.render()
+    return {
+        'status': response.status_code,
+        'body': None if method == 'HEAD' else response_body(response),
+    }
@@ -0,0 +1,80 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .memberships import user_memberships
+
+
+def membership_flags(user, recipes):
+    if user.is_anonymous:
+        return ''
+    favorites = user_memberships(user, 'favorites')
+    carts = user_memberships(user, 'shoppingcarts')
+    subscriptions = user_memberships(user, 'subscriptions')
+    return ''.join(
+        f'{recipe_id in favorites:d}{recipe_id in carts:d}'
+        f'{author_id in subscriptions:d}'
+        for recipe_id, author_id in recipes
+    )
+
+
+def make_etag(*parts, weak=False):
+    etag = quote_etag(
+        hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    )
+    return f'W/{etag}' if weak else etag
+
+
+def response_format(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer.format if renderer else 'json'
+
+
+def recipe_etag(request, recipe_id, author_id, updated_at, fields=()):
+    return make_etag(
+        response_format(request),
+        ','.join(fields),
+        recipe_id,
+        updated_at.isoformat(),
+        membership_flags(request.user, [(recipe_id, author_id)])
+    )
+
+
+def page_etag(request, recipes, count, fields=()):
+    return make_etag(
+        response_format(request),
+        ','.join(fields),
+        count,
+        max(
+            (recipe.updated_at for recipe in recipes), default=''
+        ),
+        ','.join(str(recipe.id) for recipe in recipes),
+        membership_flags(
+            request.user,
+            [(recipe.id, recipe.author_id) for recipe in recipes]
+        ),
+        weak=True
+    )
+
+
+def not_modified(request, etag, updated_at=None):
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=(
+            timegm(updated_at.utctimetuple())
+            if updated_at and request.user.is_anonymous else None
+        )
+    )
+
+
+def set_validators(response, etag, updated_at=None):
+    response['ETag'] = etag
+    if updated_at is not None:
+        response['Last-Modified'] = http_date(
+            timegm(updated_at.utctimetuple())
+        )
+    patch_vary_headers(response, ('Authorization',))
+    return response
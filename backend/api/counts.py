@@ -0,0 +1,99 @@
+import hashlib
+import json
+from functools import cached_property, partial
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models.query import QuerySet
+
+from core.cache import tiered_cache
+from recipe.models import (
+    COUNTS_CACHE_NAMESPACE,
+    Favorite,
+    ShoppingCart,
+    Subscription,
+)
+
+COUNT_CACHE_TIMEOUT = 30
+USER_SCOPED_TABLES = {
+    model._meta.db_table for model in (Favorite, ShoppingCart, Subscription)
+}
+
+
+def count_namespaces(query, user_id):
+    tables = sorted(
+        {join.table_name for join in query.alias_map.values()}
+        or {query.model._meta.db_table}
+    )
+    return [
+        COUNTS_CACHE_NAMESPACE.format(
+            f'{table}:{user_id}' if table in USER_SCOPED_TABLES else table
+        )
+        for table in tables
+    ]
+
+
+def count_cache_key(queryset, user_id):
+    query = queryset.query
+    sql, params = query.sql_with_params()
+    return ':'.join((
+        *(tiered_cache.key(namespace)
+          for namespace in count_namespaces(query, user_id)),
+        hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest(),
+    ))
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    try:
+        if not query.where and len(query.alias_map) <= 1:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        plan = json.loads(queryset.explain(format='json'))
+    except DatabaseError:
+        return None
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+def measure(queryset):
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+        return estimate, True
+    return queryset.count(), False
+
+
+def queryset_count(queryset, user):
+    queryset = queryset.order_by()
+    try:
+        key = count_cache_key(queryset, user.pk)
+    except EmptyResultSet:
+        return 0, False
+    return tiered_cache.get_or_set(
+        key, partial(measure, queryset), COUNT_CACHE_TIMEOUT
+    )
+
+
+class CountingPaginator(Paginator):
+    def __init__(self, object_list, per_page, user=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.user = user
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        count, self.approximate = queryset_count(self.object_list, self.user)
+        return count
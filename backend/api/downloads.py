@@ -0,0 +1,71 @@
+import hashlib
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from core.cache import tiered_cache
+from recipe.models import ShoppingCart
+
+TEMP_PREFIX = '.tmp-'
+RENDER_CACHE_TIMEOUT = 60
+SERVE_WINDOW = 300
+
+
+def shopping_list_name(user):
+    recipes = ShoppingCart.objects.filter(
+        user=user, recipe__deleted_at__isnull=True
+    ).order_by('recipe_id').values_list('recipe_id', 'recipe__updated_at')
+    digest = hashlib.sha256(
+        repr((timezone.now().date(), list(recipes))).encode()
+    ).hexdigest()[:32]
+    return f'shopping_lists/{user.pk}/{digest}.txt'
+
+
+def cached_file(name, render):
+    path = os.path.join(settings.PROTECTED_ROOT, name)
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+    content = tiered_cache.get_or_set(name, render, RENDER_CACHE_TIMEOUT)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=directory, prefix=TEMP_PREFIX, delete=False
+    ) as file:
+        file.write(content)
+    os.replace(file.name, path)
+    deadline = time.time() - SERVE_WINDOW
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.path == path:
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def protected_file_response(name, filename, content_type):
+    if not settings.ACCEL_REDIRECT:
+        return FileResponse(
+            open(os.path.join(settings.PROTECTED_ROOT, name), 'rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type
+        )
+    response = HttpResponse(content_type=content_type)
+    response['X-Accel-Redirect'] = quote(settings.PROTECTED_URL + name)
+    response['Content-Disposition'] = content_disposition_header(
+        True, filename
+    )
+    return response
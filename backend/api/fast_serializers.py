@@ -0,0 +1,145 @@
+from operator import attrgetter
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager
+from rest_framework.fields import (
+    CharField,
+    FileField,
+    IntegerField,
+    ReadOnlyField,
+    SerializerMethodField,
+)
+from rest_framework.serializers import ListSerializer, Serializer
+from rest_framework.settings import api_settings
+
+from .serializers import RecipeSerializer
+
+
+def is_model_path(model, attrs):
+    for attr in attrs:
+        if model is None:
+            return False
+        try:
+            model = model._meta.get_field(attr).related_model
+        except FieldDoesNotExist:
+            return False
+    return True
+
+
+def compile_getter(serializer, field):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if field.source == '*':
+        return lambda obj: obj
+    if is_model_path(model, field.source_attrs):
+        return attrgetter(field.source)
+    return field.get_attribute
+
+
+def file_url(field):
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def represent(value, holder):
+        if not value:
+            return None
+        if not use_url:
+            return value.name
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        request = holder.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    return represent
+
+
+def compile_representation(field):
+    if isinstance(field, ListSerializer):
+        plan = compile_plan(field.child)
+        return lambda value, holder: [
+            represent(plan, item, holder)
+            for item in (
+                value.all() if isinstance(value, Manager) else value
+            )
+        ]
+    if isinstance(field, Serializer):
+        plan = compile_plan(field)
+        return lambda value, holder: represent(plan, value, holder)
+    if isinstance(field, FileField):
+        return file_url(field)
+    if isinstance(field, IntegerField):
+        return lambda value, holder: int(value)
+    if isinstance(field, CharField):
+        return lambda value, holder: str(value)
+    if type(field) is ReadOnlyField:
+        return lambda value, holder: value
+    return lambda value, holder: field.to_representation(value)
+
+
+def compile_plan(serializer):
+    if type(serializer).to_representation is not Serializer.to_representation:
+        serializer_class = type(serializer)
+        return lambda obj, holder: serializer_class(
+            obj, context=holder.context
+        ).data
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, SerializerMethodField):
+            method = getattr(type(serializer), field.method_name)
+            plan.append((name, None, method))
+        else:
+            plan.append((
+                name,
+                compile_getter(serializer, field),
+                compile_representation(field)
+            ))
+    return plan
+
+
+def represent(plan, obj, holder):
+    if callable(plan):
+        return plan(obj, holder)
+    data = {}
+    for name, get, to_representation in plan:
+        if get is None:
+            data[name] = to_representation(holder, obj)
+            continue
+        value = get(obj)
+        data[name] = (
+            None if value is None else to_representation(value, holder)
+        )
+    return data
+
+
+class CompiledSerializer:
+    plan = ()
+
+    def __init__(self, instance=None, many=False, context=None, fields=None,
+                 **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = {} if context is None else context
+        if fields is not None and not callable(self.plan):
+            self.plan = [entry for entry in self.plan if entry[0] in fields]
+
+    @property
+    def data(self):
+        holder = SimpleNamespace(context=self.context)
+        if self.many:
+            return [
+                represent(self.plan, obj, holder) for obj in self.instance
+            ]
+        return represent(self.plan, self.instance, holder)
+
+
+def compile_serializer(serializer_class):
+    return type(
+        f'Compiled{serializer_class.__name__}',
+        (CompiledSerializer,),
+        {'plan': compile_plan(serializer_class())}
+    )
+
+
+FastRecipeSerializer = compile_serializer(RecipeSerializer)
@@ -0,0 +1,41 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import caches
+
+from recipe.models import Favorite, ShoppingCart, Subscription
+
+MEMBERSHIP_CACHE_KEY = 'membership:{}:{}'
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+MEMBERSHIPS = {
+    'favorites': (Favorite, 'recipe_id'),
+    'shoppingcarts': (ShoppingCart, 'recipe_id'),
+    'subscriptions': (Subscription, 'author_id'),
+}
+
+
+def membership_cache():
+    return caches[settings.MEMBERSHIP_CACHE]
+
+
+def membership_ids(user_id, relation):
+    key = MEMBERSHIP_CACHE_KEY.format(relation, user_id)
+    ids = membership_cache().get(key)
+    if ids is None:
+        model, field = MEMBERSHIPS[relation]
+        ids = array('q', sorted(
+            model.objects.filter(user_id=user_id).values_list(
+                field, flat=True
+            )
+        ))
+        membership_cache().set(key, ids, MEMBERSHIP_CACHE_TIMEOUT)
+    return ids
+
+
+def user_memberships(user, relation):
+    return set(membership_ids(user.id, relation))
+
+
+def forget_membership(user_id, relation):
+    membership_cache().delete(MEMBERSHIP_CACHE_KEY.format(relation, user_id))
@@ -1,16 +1,23 @@
+import posixpath
+from urllib.parse import urlsplit
+
 from djoser.serializers import (
     UserSerializer as DjoserUserSerializer
 )
 from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import (
+    CharField,
+    ChoiceField,
     IntegerField,
     ModelSerializer,
     PrimaryKeyRelatedField,
     ReadOnlyField,
+    Serializer,
     SerializerMethodField,
 )
 
 from core.utils import Base64ImageField
+from recipe.ingredient_index import ingredient_index
 from recipe.models import (
     Ingredient,
     IngredientInRecipe,
@@ -22,6 +29,8 @@ from recipe.models import (
 )
 from .utils import check_duplicates, is_related
 
+BATCH_MAX_REQUESTS = 20
+
 
 class UserDetailSerializer(DjoserUserSerializer):
     is_subscribed = SerializerMethodField()
@@ -35,13 +44,7 @@ class UserDetailSerializer(DjoserUserSerializer):
         read_only_fields = fields
 
     def get_is_subscribed(self, user_instance):
-        user = self.context.get('request').user
-        return (
-            not user.is_anonymous
-            and user_instance.subscriptions_of_authors.filter(
-                user=user
-            ).exists()
-        )
+        return is_related(self, user_instance, 'subscriptions')
 
 
 class AuthorWithRecipesSerializer(UserDetailSerializer):
@@ -138,6 +141,10 @@ class RecipeWriteSerializer(ModelSerializer):
             )
             for ingredient in ingredients_data
         )
+        ingredient_index.update_recipe(
+            recipe.id,
+            [ingredient['ingredient'].id for ingredient in ingredients_data]
+        )
 
     def create(self, validated_data):
         tags = validated_data.pop('tags')
@@ -208,3 +215,24 @@ class RecipeMinifiedSerializer(ModelSerializer):
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
         read_only_fields = fields
+
+
+class BatchItemSerializer(Serializer):
+    method = ChoiceField(choices=('GET', 'HEAD'), default='GET')
+    path = CharField()
+
+    def validate_path(self, path):
+        if (
+            not posixpath.normpath(urlsplit(path).path).startswith('/api/')
+            or path.startswith('/api/batch/')
+        ):
+            raise ValidationError(
+                'Допустимы только пути API, кроме /api/batch/.'
+            )
+        return path
+
+
+class BatchSerializer(Serializer):
+    requests = BatchItemSerializer(
+        many=True, allow_empty=False, max_length=BATCH_MAX_REQUESTS
+    )
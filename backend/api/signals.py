@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_token
+from .memberships import MEMBERSHIPS, forget_membership
+from recipe.models import Favorite, ShoppingCart, Subscription, User
+from recipe.signals import rows_purged
+
+MEMBERSHIP_RELATIONS = {
+    model: relation for relation, (model, _field) in MEMBERSHIPS.items()
+}
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        forget_token(key)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def reset_membership(sender, instance, **kwargs):
+    relation = MEMBERSHIP_RELATIONS[sender]
+    transaction.on_commit(
+        lambda: forget_membership(instance.user_id, relation)
+    )
+
+
+@receiver(rows_purged)
+def reset_purged_memberships(sender, user_ids, **kwargs):
+    relation = MEMBERSHIP_RELATIONS.get(sender)
+    if relation is None:
+        return
+    for user_id in user_ids:
+        forget_membership(user_id, relation)
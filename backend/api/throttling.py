@@ -0,0 +1,67 @@
+import math
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.buckets import TokenBuckets
+
+buckets = TokenBuckets(
+    settings.THROTTLE_STORE_PATH, settings.THROTTLE_STORE_SLOTS
+)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    def __init__(self):
+        pass
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        self.rate = self.get_rate() if self.scope else None
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        capacity, period = self.parse_rate(self.rate)
+        allowed, self.wait_time = buckets.take(
+            key, capacity, capacity / period
+        )
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_time)
+
+
+class AnonBucketThrottle(TokenBucketThrottle):
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request, view)
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return super().get_cache_key(request, view)
+
+
+class ScopedBucketThrottle(TokenBucketThrottle):
+    scope = None
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
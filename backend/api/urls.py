@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    BatchView,
     UserViewSet,
     IngredientViewSet,
     RecipeViewSet,
@@ -15,5 +17,21 @@ router.register(r'recipes', RecipeViewSet)
 router.register(r'tags', TagViewSet)
 
 urlpatterns = [
-    path('auth/', include('djoser.urls.authtoken'))
-] + router.urls
+    path('auth/', include('djoser.urls.authtoken')),
+    path('batch/', BatchView.as_view(), name='batch'),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    urlpatterns += [
+        path('recipes/', async_views.recipe_list),
+        path('recipes/<int:pk>/', async_views.recipe_detail),
+        path('tags/', async_views.tag_list),
+        path('tags/<int:pk>/', async_views.tag_detail),
+        path('ingredients/', async_views.ingredient_list),
+        path('ingredients/<int:pk>/', async_views.ingredient_detail),
+        path('users/subscriptions/', async_views.subscription_list),
+    ]
+
+urlpatterns += router.urls
@@ -1,10 +1,108 @@
+import hashlib
 from collections import Counter
+from functools import partial
 
-from django.core.exceptions import ValidationError
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Case, Count, F, When
 import django_filters
+from rest_framework import exceptions
 from rest_framework.pagination import PageNumberPagination
 
-from recipe.models import Recipe, Ingredient
+from .counts import COUNT_CACHE_TIMEOUT, CountingPaginator, count_cache_key
+from .memberships import user_memberships
+from core.cache import tiered_cache
+from recipe.models import (
+    INGREDIENTS_CACHE_NAMESPACE,
+    SUBSCRIPTIONS_CACHE_NAMESPACE,
+    TAGS_CACHE_NAMESPACE,
+    Ingredient,
+    Recipe,
+    Tag,
+)
+
+RECIPE_CARD_FIELDS = (
+    'id', 'name', 'image', 'cooking_time',
+    'is_favorited', 'is_in_shopping_cart',
+)
+RECIPE_COLUMNS = ('name', 'image', 'text', 'cooking_time')
+MAX_RECIPE_IDS = 100
+RECIPE_ORDERINGS = (
+    ('popular', 'Популярные'),
+    ('trending', 'В тренде'),
+)
+RECIPE_ORDERING_FIELDS = {
+    'popular': ('-popularity', '-id'),
+    'trending': ('-trending_score', '-id'),
+}
+PAYLOAD_CACHE_TIMEOUT = 3600
+SUBSCRIPTIONS_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_FIELD = 'count_is_estimate'
+FACET_TAG_FIELDS = ('id', 'name', 'slug')
+
+
+def digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def tags_cache_key():
+    return tiered_cache.key(TAGS_CACHE_NAMESPACE)
+
+
+def ingredients_cache_key(query_params):
+    return tiered_cache.key(
+        INGREDIENTS_CACHE_NAMESPACE,
+        digest(query_params.get('name', '').lower())
+    )
+
+
+def subscriptions_cache_key(request):
+    return tiered_cache.key(
+        SUBSCRIPTIONS_CACHE_NAMESPACE.format(request.user.pk),
+        digest(request.build_absolute_uri())
+    )
+
+
+def facet_tags():
+    return tiered_cache.get_or_set(
+        tiered_cache.key(TAGS_CACHE_NAMESPACE, 'bits'),
+        lambda: list(
+            Tag.objects.order_by('name').values(*FACET_TAG_FIELDS, 'bit')
+        ),
+        PAYLOAD_CACHE_TIMEOUT
+    )
+
+
+def count_tags(recipes):
+    masks = recipes.order_by().values_list('tags_mask').annotate(
+        total=Count('pk')
+    )
+    counts = Counter()
+    for mask, total in masks:
+        while mask:
+            bit = mask & -mask
+            counts[bit.bit_length() - 1] += total
+            mask ^= bit
+    return counts
+
+
+def tag_facets(recipes, user):
+    try:
+        key = ':'.join((
+            tags_cache_key(), count_cache_key(recipes.order_by(), user.pk)
+        ))
+    except EmptyResultSet:
+        counts = Counter()
+    else:
+        counts = tiered_cache.get_or_set(
+            key, lambda: count_tags(recipes), COUNT_CACHE_TIMEOUT
+        )
+    return [
+        {
+            **{field: tag[field] for field in FACET_TAG_FIELDS},
+            'count': counts[tag['bit']],
+        }
+        for tag in facet_tags()
+    ]
 
 
 def check_duplicates(items, field_name):
@@ -34,17 +132,75 @@ def check_duplicates(items, field_name):
     )
 
 
+def recipes_with_relations():
+    return Recipe.objects.select_related('author').prefetch_related(
+        'tags', 'recipe_ingredients__ingredient'
+    )
+
+
+def split_fields(value):
+    return [field for field in value.split(',') if field]
+
+
+def requested_fields(query_params, all_fields):
+    view = query_params.get('view')
+    if view not in (None, 'card'):
+        raise exceptions.ValidationError(
+            {'view': f'Неизвестный вид: {view}.'}
+        )
+    fields = RECIPE_CARD_FIELDS if view == 'card' else all_fields
+    selected = split_fields(query_params.get('fields', ''))
+    omitted = split_fields(query_params.get('omit', ''))
+    unknown = sorted(set(selected + omitted) - set(all_fields))
+    if unknown:
+        raise exceptions.ValidationError(
+            {'fields': f'Неизвестные поля: {", ".join(unknown)}.'}
+        )
+    return tuple(
+        field for field in fields
+        if (not selected or field in selected) and field not in omitted
+    )
+
+
+def recipes_with_fields(fields):
+    recipes = Recipe.objects.only(
+        'id', 'author', 'updated_at',
+        *(field for field in fields if field in RECIPE_COLUMNS)
+    )
+    if 'author' in fields:
+        recipes = recipes.select_related('author')
+    if 'tags' in fields:
+        recipes = recipes.prefetch_related('tags')
+    if 'ingredients' in fields:
+        recipes = recipes.prefetch_related('recipe_ingredients__ingredient')
+    return recipes
+
+
 def is_related(self, obj, relation):
     user = self.context['request'].user
     if user.is_anonymous:
         return False
-    return getattr(obj, relation).filter(user=user).exists()
+    if relation not in self.context:
+        self.context[relation] = user_memberships(user, relation)
+    return obj.id in self.context[relation]
 
 
 class LimitPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
 
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CountingPaginator, user=request.user
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.page.paginator.approximate:
+            response.data[COUNT_ESTIMATE_FIELD] = True
+        return response
+
 
 class IngredientFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(
@@ -56,17 +212,54 @@ class IngredientFilter(django_filters.FilterSet):
         fields = ['name']
 
 
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+def tag_choices():
+    return [(slug, slug) for slug in Tag.bits_by_slug()]
+
+
 class RecipeFilter(django_filters.FilterSet):
-    tags = django_filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = django_filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags'
+    )
     author = django_filters.NumberFilter(field_name='author')
+    ids = NumberInFilter(method='filter_ids')
     is_favorited = django_filters.NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = django_filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    ordering = django_filters.ChoiceFilter(
+        choices=RECIPE_ORDERINGS,
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ['tags', 'author', 'is_favorited', 'is_in_shopping_cart']
+        fields = [
+            'tags', 'author', 'ids', 'is_favorited', 'is_in_shopping_cart',
+            'ordering'
+        ]
+
+    def filter_tags(self, recipes, name, slugs):
+        return recipes.alias(
+            tag_hits=F('tags_mask').bitand(Tag.mask_for_slugs(slugs))
+        ).filter(tag_hits__gt=0)
+
+    def filter_ids(self, recipes, name, values):
+        if len(values) > MAX_RECIPE_IDS:
+            raise exceptions.ValidationError({
+                'ids': f'Можно запросить не больше {MAX_RECIPE_IDS} рецептов.'
+            })
+        ids = list(dict.fromkeys(int(value) for value in values))
+        return recipes.filter(pk__in=ids).order_by(Case(
+            *(When(pk=pk, then=position) for position, pk in enumerate(ids))
+        ))
+
+    def filter_ordering(self, recipes, name, value):
+        return recipes.order_by(*RECIPE_ORDERING_FIELDS[value])
 
     def filter_is_favorited(self, recipes, name, value):
         user = self.request.user
@@ -1,8 +1,7 @@
-import io
+from functools import cached_property
 
 from djoser.serializers import UserCreateSerializer
 from djoser.views import UserViewSet as DjoserUserViewSet
-from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
 from django.urls import reverse
@@ -13,15 +12,33 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from .batch import run_sub_request
+from .conditional import (
+    not_modified,
+    page_etag,
+    recipe_etag,
+    set_validators,
+)
+from .downloads import (
+    cached_file,
+    protected_file_response,
+    shopping_list_name,
+)
+from .fast_serializers import FastRecipeSerializer
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     AuthorWithRecipesSerializer,
+    BatchSerializer,
     IngredientSerializer,
     RecipeMinifiedSerializer,
     RecipeSerializer,
@@ -30,7 +47,23 @@ from .serializers import (
     UserAvatarSerializer,
     UserDetailSerializer,
 )
-from .utils import IngredientFilter, LimitPagination, RecipeFilter
+from .utils import (
+    PAYLOAD_CACHE_TIMEOUT,
+    SUBSCRIPTIONS_CACHE_TIMEOUT,
+    IngredientFilter,
+    LimitPagination,
+    RecipeFilter,
+    ingredients_cache_key,
+    recipes_with_fields,
+    recipes_with_relations,
+    requested_fields,
+    subscriptions_cache_key,
+    tag_facets,
+    tags_cache_key,
+)
+from core.cache import tiered_cache
+from recipe.feed import decode_cursor, read_feed
+from recipe.ingredient_index import ingredient_index
 from recipe.models import (
     Favorite,
     Ingredient,
@@ -41,12 +74,14 @@ from recipe.models import (
     Tag,
     User,
 )
+from recipe.purge import delete_recipes, delete_users
 
 
 class UserViewSet(DjoserUserViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.filter(deleted_at__isnull=True)
     pagination_class = LimitPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_scope = None
 
     def get_permissions(self):
         if self.action == 'me':
@@ -58,6 +93,9 @@ class UserViewSet(DjoserUserViewSet):
             return UserDetailSerializer
         return UserCreateSerializer
 
+    def perform_destroy(self, instance):
+        delete_users(User.objects.filter(pk=instance.pk))
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -102,18 +140,27 @@ class UserViewSet(DjoserUserViewSet):
         detail=False,
         methods=['get'],
         url_path='subscriptions',
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        throttle_scope='subscriptions'
     )
     def subscriptions(self, request):
-        subscriptions = request.user.subscriptions.all()
-        authors = [sub.author for sub in subscriptions]
-        page = self.paginate_queryset(authors)
-        serializer = AuthorWithRecipesSerializer(
-            page,
-            many=True,
-            context={'request': request}
-        )
-        return self.get_paginated_response(serializer.data)
+        def subscriptions_page():
+            authors = User.objects.filter(
+                subscriptions_of_authors__user=request.user
+            ).order_by('subscriptions_of_authors__id')
+            page = self.paginate_queryset(authors)
+            serializer = AuthorWithRecipesSerializer(
+                page,
+                many=True,
+                context={'request': request}
+            )
+            return self.get_paginated_response(serializer.data).data
+
+        return Response(tiered_cache.get_or_set(
+            subscriptions_cache_key(request),
+            subscriptions_page,
+            SUBSCRIPTIONS_CACHE_TIMEOUT
+        ))
 
     @action(
         detail=False,
@@ -148,14 +195,31 @@ class TagViewSet(ReadOnlyModelViewSet):
     def get_queryset(self):
         return self.queryset.order_by('name')
 
+    def list(self, request, *args, **kwargs):
+        tags = super().list
+        return Response(tiered_cache.get_or_set(
+            tags_cache_key(),
+            lambda: tags(request, *args, **kwargs).data,
+            PAYLOAD_CACHE_TIMEOUT
+        ))
+
 
 class IngredientViewSet(ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
+    throttle_scope = 'ingredients'
     serializer_class = IngredientSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        ingredients = super().list
+        return Response(tiered_cache.get_or_set(
+            ingredients_cache_key(request.query_params),
+            lambda: ingredients(request, *args, **kwargs).data,
+            PAYLOAD_CACHE_TIMEOUT
+        ))
+
 
 class RecipeViewSet(ModelViewSet):
     queryset = Recipe.objects.all()
@@ -163,15 +227,82 @@ class RecipeViewSet(ModelViewSet):
     filterset_class = RecipeFilter
     pagination_class = LimitPagination
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    throttle_scope = None
+
+    @cached_property
+    def is_read(self):
+        return (
+            self.action in ['list', 'retrieve']
+            and self.request.method in SAFE_METHODS
+        )
+
+    @cached_property
+    def recipe_fields(self):
+        return requested_fields(
+            self.request.query_params, RecipeSerializer.Meta.fields
+        )
+
+    def get_queryset(self):
+        if self.is_read:
+            return recipes_with_fields(self.recipe_fields)
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RecipeWriteSerializer
+        if self.is_read:
+            return FastRecipeSerializer
         return RecipeSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        if self.is_read:
+            kwargs['fields'] = self.recipe_fields
+        return super().get_serializer(*args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        delete_recipes(Recipe.objects.filter(pk=instance.pk))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(
+            queryset.select_related(None).prefetch_related(None).only(
+                'id', 'author', 'updated_at'
+            )
+        )
+        etag = page_etag(
+            request, page, self.paginator.page.paginator.count,
+            self.recipe_fields
+        )
+        response = not_modified(request, etag)
+        if response is None:
+            recipes = queryset.in_bulk([recipe.id for recipe in page])
+            response = self.get_paginated_response(self.get_serializer(
+                [recipes[row.id] for row in page if row.id in recipes],
+                many=True
+            ).data)
+        return set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            recipe = Recipe.objects.filter(pk=kwargs['pk']).values(
+                'author_id', 'updated_at'
+            ).first()
+        except ValueError:
+            recipe = None
+        if recipe is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = recipe_etag(
+            request, int(kwargs['pk']), recipe['author_id'],
+            recipe['updated_at'], self.recipe_fields
+        )
+        response = not_modified(
+            request, etag, recipe['updated_at']
+        ) or super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, recipe['updated_at'])
+
     def _handle_add_remove(self, request, pk, model):
         user = request.user
         if request.method != 'POST':
@@ -225,12 +356,20 @@ class RecipeViewSet(ModelViewSet):
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        throttle_scope='shopping_cart'
     )
     def download_shopping_cart(self, request):
-        user = request.user
+        name = shopping_list_name(request.user)
+        cached_file(name, lambda: self.render_shopping_list(request.user))
+        return protected_file_response(
+            name, 'shopping_cart.txt', 'text/plain; charset=utf-8'
+        )
+
+    def render_shopping_list(self, user):
         ingredient_links = IngredientInRecipe.objects.filter(
-            recipe__shoppingcarts__user=user
+            recipe__shoppingcarts__user=user,
+            recipe__deleted_at__isnull=True
         ).select_related('ingredient')
 
         ingredients = {}
@@ -274,13 +413,111 @@ class RecipeViewSet(ModelViewSet):
                 ]
             }
         )
+        return content.encode('utf-8')
 
-        file_stream = io.BytesIO(content.encode('utf-8'))
-        return FileResponse(
-            file_stream,
-            as_attachment=True,
-            filename='shopping_cart.txt'
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='pantry'
+    )
+    def pantry(self, request):
+        try:
+            ingredient_ids = {
+                int(ingredient_id)
+                for ingredient_id in request.query_params.getlist(
+                    'ingredients'
+                )
+            }
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Id продуктов должны быть числами.'}
+            )
+        if not ingredient_ids:
+            raise ValidationError(
+                {'ingredients': 'Нужно указать хотя бы один продукт.'}
+            )
+        page = self.paginate_queryset(ingredient_index.rank(ingredient_ids))
+        recipes = recipes_with_relations().in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        found = [
+            (recipes[recipe_id], covered, missing)
+            for recipe_id, covered, missing in page
+            if recipe_id in recipes
+        ]
+        serializer = FastRecipeSerializer(
+            [recipe for recipe, _, _ in found],
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return self.get_paginated_response([
+            {
+                **data,
+                'ingredients_covered': covered,
+                'ingredients_missing': missing,
+            }
+            for data, (_, covered, missing) in zip(serializer.data, found)
+        ])
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='facets'
+    )
+    def facets(self, request):
+        query_params = request.query_params.copy()
+        query_params.pop('tags', None)
+        filterset = RecipeFilter(
+            query_params, queryset=Recipe.objects.all(), request=request
         )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return Response(tag_facets(filterset.qs, request.user))
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            cursor = decode_cursor(cursor)
+            if cursor is None:
+                raise ValidationError({'cursor': 'Некорректный курсор.'})
+        recipe_ids, next_cursor = read_feed(
+            request.user,
+            self.paginator.get_page_size(request),
+            cursor
+        )
+        recipes = recipes_with_relations().in_bulk(recipe_ids)
+        return Response({
+            'next': replace_query_param(
+                request.build_absolute_uri(), 'cursor', next_cursor
+            ) if next_cursor else None,
+            'results': FastRecipeSerializer(
+                [
+                    recipes[recipe_id] for recipe_id in recipe_ids
+                    if recipe_id in recipes
+                ],
+                many=True,
+                context=self.get_serializer_context()
+            ).data,
+        })
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='similar'
+    )
+    def similar(self, request, pk=None):
+        recipes = Recipe.objects.filter(
+            neighbour_of__recipe=self.get_object()
+        ).order_by('neighbour_of__rank')
+        return Response(RecipeMinifiedSerializer(
+            recipes, many=True, context=self.get_serializer_context()
+        ).data)
 
     @action(
         detail=True,
@@ -297,3 +534,15 @@ class RecipeViewSet(ModelViewSet):
         return Response({'short-link': request.build_absolute_uri(
             reverse('recipe-short-link', args=[pk])
         )})
+
+
+class BatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'responses': [
+            run_sub_request(request, item['method'], item['path'])
+            for item in serializer.validated_data['requests']
+        ]})
@@ -0,0 +1,145 @@
+import json
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import QueryStat, RequestProfile, SlowQuery
+from .profiling import delete_profile, profile_path
+
+
+class SlowProfileFilter(admin.SimpleListFilter):
+    title = 'Длительность'
+    parameter_name = 'slower_than'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('100', 'дольше 100 мс'),
+            ('1000', 'дольше 1 с'),
+            ('5000', 'дольше 5 с'),
+        )
+
+    def queryset(self, request, profiles):
+        if self.value():
+            return profiles.filter(duration__gt=float(self.value()))
+        return profiles
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'method', 'path', 'user', 'status_code',
+        'duration_ms', 'query_count', 'query_time_ms', 'trigger',
+    )
+    list_filter = (SlowProfileFilter, 'trigger', 'method', 'status_code')
+    search_fields = ('path',)
+    readonly_fields = (
+        'created_at', 'method', 'path', 'user', 'status_code', 'duration',
+        'samples', 'query_count', 'query_time', 'trigger', 'folded_link',
+        'queries',
+    )
+    exclude = ('name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/folded/',
+                self.admin_site.admin_view(self.folded),
+                name='core_requestprofile_folded'
+            ),
+        ] + super().get_urls()
+
+    def folded(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        try:
+            stacks = open(profile_path(profile.name, 'folded'), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(
+            stacks,
+            as_attachment=True,
+            filename=f'profile-{profile.pk}.folded',
+            content_type='text/plain; charset=utf-8'
+        )
+
+    @admin.display(description='Время, мс', ordering='duration')
+    def duration_ms(self, profile):
+        return round(profile.duration, 1)
+
+    @admin.display(description='Время запросов, мс', ordering='query_time')
+    def query_time_ms(self, profile):
+        return round(profile.query_time, 1)
+
+    @admin.display(description='Flame graph')
+    def folded_link(self, profile):
+        return format_html(
+            '<a href="{}">{}.folded</a>',
+            reverse('admin:core_requestprofile_folded', args=[profile.pk]),
+            profile.name
+        )
+
+    @admin.display(description='SQL-запросы')
+    def queries(self, profile):
+        try:
+            with open(
+                profile_path(profile.name, 'json'), encoding='utf-8'
+            ) as file:
+                queries = json.load(file)
+        except FileNotFoundError:
+            return '-'
+        return format_html(
+            '<table>{}</table>',
+            format_html_join(
+                '', '<tr><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+                (
+                    (
+                        f'{query["duration"]:.1f}', query['alias'],
+                        query['sql']
+                    )
+                    for query in queries
+                )
+            )
+        )
+
+    def delete_model(self, request, profile):
+        delete_profile(profile.name)
+        super().delete_model(request, profile)
+
+    def delete_queryset(self, request, queryset):
+        for name in queryset.values_list('name', flat=True):
+            delete_profile(name)
+        super().delete_queryset(request, queryset)
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(QueryStat)
+class QueryStatAdmin(ReadOnlyAdmin):
+    list_display = (
+        'fingerprint', 'view', 'calls', 'total_time', 'max_time', 'last_seen',
+    )
+    list_filter = ('view',)
+    search_fields = ('sql', 'fingerprint')
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(ReadOnlyAdmin):
+    list_display = (
+        'created_at', 'fingerprint', 'view', 'duration', 'analyzed',
+    )
+    list_filter = ('analyzed', 'view')
+    search_fields = ('sql', 'fingerprint')
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        if settings.QUERY_LOG:
+            from .querylog import install
+
+            connection_created.connect(install)
+        if settings.WARM_UP_WORKERS:
+            from .warmup import STEPS, warm_up
+
+            warm_up(STEPS)
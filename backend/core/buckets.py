@@ -0,0 +1,78 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+SLOT = struct.Struct('<Qdd')
+PROBES = 8
+
+
+def digest(key):
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little'
+    ) or 1
+
+
+class TokenBuckets:
+    def __init__(self, path, slots):
+        self.path = str(path)
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.pid = None
+        self.fd = None
+        self.table = None
+
+    def open(self):
+        if self.fd is not None:
+            self.table.close()
+            os.close(self.fd)
+        size = self.slots * SLOT.size
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.table = mmap.mmap(self.fd, size)
+        self.pid = os.getpid()
+
+    @contextmanager
+    def locked(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield self.table
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def find(self, table, key_digest):
+        start = key_digest % self.slots
+        oldest = None
+        for probe in range(PROBES):
+            offset = (start + probe) % self.slots * SLOT.size
+            stored, _, updated = SLOT.unpack_from(table, offset)
+            if stored in (key_digest, 0):
+                return offset
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        return oldest[0]
+
+    def take(self, key, capacity, refill_rate):
+        key_digest = digest(key)
+        now = time.time()
+        with self.locked() as table:
+            offset = self.find(table, key_digest)
+            stored, tokens, updated = SLOT.unpack_from(table, offset)
+            if stored != key_digest:
+                tokens, updated = capacity, now
+            tokens = min(
+                capacity, tokens + max(0.0, now - updated) * refill_rate
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            SLOT.pack_into(table, offset, key_digest, tokens, now)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
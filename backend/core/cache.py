@@ -0,0 +1,212 @@
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'cache-version:{}'
+LOCK_KEY = '{}:lock'
+STATS_KEY = 'tiered-cache-stats'
+STATS_INTERVAL = 30
+STATS_TTL = 600
+WAIT_INTERVAL = 0.05
+
+
+class LocalLRUCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self.items[key]
+                return default
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.items[key] = (
+                value, time.monotonic() + (self.ttl if ttl is None else ttl)
+            )
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class TieredCache:
+    def __init__(self, alias, max_size, local_ttl, lock_timeout, beta=1.0):
+        self.alias = alias
+        self.local = LocalLRUCache(max_size, local_ttl)
+        self.local_ttl = local_ttl
+        self.lock_timeout = lock_timeout
+        self.beta = beta
+        self.guard = threading.Lock()
+        self.flights = {}
+        self.counters = Counter()
+        self.reported_at = time.monotonic()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def count(self, name):
+        with self.guard:
+            self.counters[name] += 1
+            report = time.monotonic() - self.reported_at >= STATS_INTERVAL
+            if report:
+                self.reported_at = time.monotonic()
+        if report:
+            self.report()
+
+    def report(self):
+        with self.guard:
+            counters = dict(self.counters)
+        now = time.time()
+        stats = {
+            pid: entry
+            for pid, entry in (self.shared.get(STATS_KEY) or {}).items()
+            if now - entry[0] < STATS_TTL
+        }
+        stats[os.getpid()] = (now, counters)
+        self.shared.set(STATS_KEY, stats, None)
+
+    def stats(self):
+        self.report()
+        total = Counter()
+        for _, counters in (self.shared.get(STATS_KEY) or {}).values():
+            total.update(counters)
+        return total
+
+    def version(self, namespace):
+        key = VERSION_KEY.format(namespace)
+        version = self.shared.get(key)
+        if version is None:
+            version = time.time_ns()
+            if not self.shared.add(key, version, None):
+                version = self.shared.get(key, version)
+        return version
+
+    def key(self, namespace, *parts):
+        return ':'.join(map(str, (namespace, self.version(namespace), *parts)))
+
+    def invalidate(self, namespace):
+        self.shared.set(VERSION_KEY.format(namespace), time.time_ns(), None)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def store(self, key, entry):
+        self.local.set(
+            key, entry, max(min(self.local_ttl, entry[2] - time.time()), 0)
+        )
+        return entry
+
+    def lookup(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            self.count('local_hits')
+            return entry
+        entry = self.shared.get(key)
+        if entry is not None:
+            self.count('shared_hits')
+            self.store(key, entry)
+        return entry
+
+    def is_fresh(self, entry):
+        _, delta, expires_at = entry
+        return time.time() - (
+            delta * self.beta * math.log(1 - random.random())
+        ) < expires_at
+
+    def get_or_set(self, key, compute, timeout):
+        entry = self.lookup(key)
+        if entry is not None and self.is_fresh(entry):
+            return entry[0]
+        self.count('misses' if entry is None else 'early_refreshes')
+        with self.guard:
+            flight = self.flights.setdefault(key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            return self.refresh(key, compute, timeout, flight[0], entry)
+        finally:
+            with self.guard:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self.flights[key]
+
+    def refresh(self, key, compute, timeout, flight, stale):
+        if not flight.acquire(blocking=stale is None):
+            self.count('stale_hits')
+            return stale[0]
+        try:
+            if stale is None:
+                entry = self.shared.get(key)
+                if entry is not None:
+                    return self.store(key, entry)[0]
+            locked = self.shared.add(
+                LOCK_KEY.format(key), os.getpid(), self.lock_timeout
+            )
+            if not locked:
+                if stale is not None:
+                    self.count('stale_hits')
+                    return stale[0]
+                entry = self.wait(key)
+                if entry is not None:
+                    return entry[0]
+                self.count('lock_timeouts')
+            try:
+                return self.compute(key, compute, timeout)
+            finally:
+                if locked:
+                    self.shared.delete(LOCK_KEY.format(key))
+        finally:
+            flight.release()
+
+    def wait(self, key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.count('waits')
+                return self.store(key, entry)
+        return None
+
+    def compute(self, key, compute, timeout):
+        started = time.monotonic()
+        value = compute()
+        entry = (value, time.monotonic() - started, time.time() + timeout)
+        self.shared.set(key, entry, timeout)
+        self.store(key, entry)
+        self.count('computes')
+        return value
+
+
+tiered_cache = TieredCache(
+    settings.TIERED_CACHE_ALIAS,
+    settings.TIERED_CACHE_SIZE,
+    settings.TIERED_CACHE_LOCAL_TTL,
+    settings.TIERED_CACHE_LOCK_TIMEOUT,
+    settings.TIERED_CACHE_BETA
+)
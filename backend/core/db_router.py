@@ -0,0 +1,60 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PRIMARY = 'default'
+REPLICA_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+    'END'
+)
+
+read_database = ContextVar('read_database', default=PRIMARY)
+replica_health = {}
+
+
+def check_replica(alias):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return True
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return False
+    return lag is None or lag <= settings.REPLICA_MAX_LAG
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    checked_at, healthy = replica_health.get(alias, (None, True))
+    if (
+        checked_at is None
+        or now - checked_at >= settings.REPLICA_HEALTH_INTERVAL
+    ):
+        healthy = check_replica(alias)
+        replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def choose_replica():
+    replicas = [
+        alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)
+    ]
+    return random.choice(replicas) if replicas else PRIMARY
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
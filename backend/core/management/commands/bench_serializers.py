@@ -0,0 +1,80 @@
+import time
+from itertools import cycle, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastRecipeSerializer
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeSerializer
+from api.utils import recipes_with_relations
+from recipe.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение скорости RecipeSerializer и скомпилированного '
+        'сериализатора на странице рецептов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument(
+            '--user',
+            help='username, от имени которого считаются флаги рецептов'
+        )
+
+    def handle(self, *args, **options):
+        recipes = list(recipes_with_relations().order_by('-published_at'))
+        if not recipes:
+            raise CommandError('В базе нет рецептов.')
+        page = list(islice(cycle(recipes), options['page_size']))
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', HTTP_HOST=options['host']
+        ))
+        if options['user']:
+            try:
+                request.user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден.'
+                )
+        variants = (
+            ('DRF', RecipeSerializer, JSONRenderer()),
+            ('Compiled', FastRecipeSerializer, FastJSONRenderer()),
+        )
+
+        def render(serializer_class, renderer):
+            return renderer.render(serializer_class(
+                page, many=True, context={'request': request}
+            ).data)
+
+        outputs = {
+            name: render(serializer_class, renderer)
+            for name, serializer_class, renderer in variants
+        }
+        if len(set(outputs.values())) != 1:
+            raise CommandError('Ответы сериализаторов отличаются.')
+        self.stdout.write(
+            f'Страница: {len(page)} рецептов, '
+            f'{len(outputs["DRF"])} байт, ответы совпадают'
+        )
+        timings = {}
+        for name, serializer_class, renderer in variants:
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                render(serializer_class, renderer)
+            timings[name] = (
+                time.perf_counter() - started
+            ) / options['iterations']
+            self.stdout.write(
+                f'{name:>8}: {timings[name] * 1000:.2f} мс на страницу, '
+                f'{1 / timings[name]:.0f} страниц/с'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение: {timings["DRF"] / timings["Compiled"]:.1f}x'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import tiered_cache
+
+HITS = ('local_hits', 'shared_hits', 'waits', 'stale_hits')
+COUNTERS = HITS + (
+    'misses', 'early_refreshes', 'computes', 'lock_timeouts',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Статистика попаданий многоуровневого кэша по воркерам, '
+        'активным в последние минуты'
+    )
+
+    def handle(self, *args, **options):
+        stats = tiered_cache.stats()
+        for name in COUNTERS:
+            self.stdout.write(f'{name:<16}{stats[name]:>12}')
+        lookups = sum(stats[name] for name in HITS) + stats['misses']
+        if lookups:
+            self.stdout.write(self.style.SUCCESS(
+                f'Доля попаданий: '
+                f'{sum(stats[name] for name in HITS) / lookups:.1%}'
+            ))
@@ -0,0 +1,539 @@
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_COLLECTION = (
+    settings.BASE_DIR.parent
+    / 'postman_collection' / 'foodgram.postman_collection.json'
+)
+DEFAULT_SETUP = (
+    'create_users', 'get_tokens', 'get_tags_info',
+    'get_ingradients', 'create_recipes',
+)
+DEFAULT_EXCLUDE = (
+    'bad_requests', 'delete_requests', 'logout',
+    'reset_password', 'create_users',
+)
+VARIABLE_RE = re.compile(r'{{(\w+)}}')
+ALIAS_RE = re.compile(r'const (\w+) = _\.get\(responseData, "([\w.]+)"\)')
+SETTER_RE = re.compile(
+    r'pm\.collectionVariables\.set\(["\'](\w+)["\'],\s*([^;]+?)\);?$'
+)
+PATH_RE = re.compile(r'\[(\d+)\]|\.(\w+)')
+SLICE_RE = re.compile(r'\.slice\((\d+),\s*(\d+)\)$')
+SATURATION_GAIN = 1.05
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def parse_setters(item):
+    aliases = {}
+    setters = []
+    for event in item.get('event', []):
+        for line in event.get('script', {}).get('exec', []):
+            line = line.strip()
+            alias = ALIAS_RE.search(line)
+            if alias:
+                aliases[alias.group(1)] = alias.group(2).split('.')
+                continue
+            setter = SETTER_RE.search(line)
+            if not setter:
+                continue
+            name, expression = setter.groups()
+            expression = expression.strip()
+            cut = SLICE_RE.search(expression)
+            if cut:
+                expression = expression[:cut.start()]
+                cut = slice(int(cut.group(1)), int(cut.group(2)))
+            if expression in aliases:
+                path = aliases[expression]
+            elif expression.startswith('responseData'):
+                path = [
+                    index or key for index, key in PATH_RE.findall(
+                        expression[len('responseData'):]
+                    )
+                ]
+            else:
+                continue
+            setters.append((name, path, cut))
+    return setters
+
+
+def resolve_auth(auth):
+    if not auth or auth.get('type') != 'apikey':
+        return None
+    params = {param['key']: param['value'] for param in auth['apikey']}
+    return params.get('key', 'Authorization'), params.get('value', '')
+
+
+def flatten(items, path=(), auth=None):
+    for item in items:
+        item_auth = item.get('auth', auth)
+        if 'item' in item:
+            yield from flatten(
+                item['item'], path + (item['name'],), item_auth
+            )
+            continue
+        request = item['request']
+        request_auth = (
+            request['auth'] if 'auth' in request else item_auth
+        )
+        url = request['url']
+        body = request.get('body') or {}
+        yield '/'.join(path), {
+            'name': item['name'].strip(),
+            'method': request['method'],
+            'url': url['raw'] if isinstance(url, dict) else url,
+            'headers': [
+                (header['key'], header['value'])
+                for header in request.get('header', [])
+                if not header.get('disabled')
+            ],
+            'body': body.get('raw') if body.get('mode') == 'raw' else None,
+            'auth': resolve_auth(request_auth),
+            'setters': parse_setters(item),
+        }
+
+
+def load_collection(path):
+    with open(path, encoding='utf-8') as f:
+        collection = json.load(f)
+    folders = defaultdict(list)
+    for folder, request in flatten(collection['item']):
+        folders[folder].append(request)
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', [])
+    }
+    return folders, variables
+
+
+def matches(folder, patterns):
+    return any(
+        pattern == folder or pattern in folder.split('/')
+        or pattern in folder
+        for pattern in patterns
+    )
+
+
+def substitute(text, variables):
+    return VARIABLE_RE.sub(
+        lambda match: str(variables.get(match.group(1), match.group(0))),
+        text
+    )
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body):
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            try:
+                return await self._exchange(method, target, headers, body)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                await self.close()
+                if not reused or attempt:
+                    raise
+
+    async def _exchange(self, method, target, headers, body):
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host}']
+        lines += [f'{key}: {value}' for key, value in headers]
+        lines.append(f'Content-Length: {len(body)}')
+        self.writer.write(
+            ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+        )
+        await self.writer.drain()
+        status_line = await self.reader.readuntil(b'\r\n')
+        if not status_line.strip():
+            raise ConnectionError('Пустой ответ сервера')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+        if response_headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(
+                    b';'
+                )[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            payload = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            payload = await self.reader.readexactly(
+                int(response_headers['content-length'])
+            )
+        else:
+            payload = await self.reader.read()
+            response_headers['connection'] = 'close'
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, payload
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client_errors = defaultdict(int)
+
+    def add(self, name, latency, status):
+        self.latencies[name].append(latency)
+        if status is None or status >= 500:
+            self.errors[name] += 1
+        elif status >= 400:
+            self.client_errors[name] += 1
+
+    @property
+    def total(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def all_latencies(self):
+        return [
+            latency
+            for values in self.latencies.values()
+            for latency in values
+        ]
+
+
+class VirtualUser:
+    def __init__(self, base_url, variables, stats, timeout):
+        parts = urlsplit(base_url)
+        self.connection = Connection(parts.hostname, parts.port or 80)
+        self.variables = dict(variables)
+        self.stats = stats
+        self.timeout = timeout
+
+    async def send(self, request):
+        variables = self.variables
+        headers = [
+            (key, substitute(value, variables))
+            for key, value in request['headers']
+        ]
+        if request['auth']:
+            key, value = request['auth']
+            headers.append((key, substitute(value, variables)))
+        body = b''
+        if request['body'] is not None:
+            body = substitute(request['body'], variables).encode('utf-8')
+            headers.append(('Content-Type', 'application/json'))
+        parts = urlsplit(substitute(request['url'], variables))
+        target = quote(
+            parts.path + (f'?{parts.query}' if parts.query else ''),
+            safe='/?&=%:+,;@'
+        )
+        started = time.perf_counter()
+        status = payload = None
+        try:
+            status, payload = await asyncio.wait_for(
+                self.connection.request(
+                    request['method'], target, headers, body
+                ),
+                self.timeout
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ValueError, IndexError):
+            await self.connection.close()
+        if self.stats is not None:
+            self.stats.add(
+                request['name'], time.perf_counter() - started, status
+            )
+        if status is not None and status < 400 and request['setters']:
+            self.apply_setters(request['setters'], payload)
+        return status
+
+    def apply_setters(self, setters, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        for name, path, cut in setters:
+            value = data
+            try:
+                for key in path:
+                    value = value[int(key) if key.isdigit() else key]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if cut is not None:
+                value = value[cut]
+            self.variables[name] = value
+
+    async def run(self, scenarios, weights, deadline):
+        try:
+            while time.monotonic() < deadline:
+                requests = random.choices(scenarios, weights)[0]
+                for request in requests:
+                    if time.monotonic() >= deadline:
+                        break
+                    await self.send(request)
+        finally:
+            await self.connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон сценариев из postman-коллекции '
+        'с пошаговым наращиванием числа виртуальных пользователей'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection', default=str(DEFAULT_COLLECTION),
+            help='Путь к postman-коллекции'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес сервера (по умолчанию baseUrl из коллекции)'
+        )
+        parser.add_argument(
+            '--setup', nargs='*', default=list(DEFAULT_SETUP),
+            help='Папки коллекции, выполняемые один раз перед нагрузкой'
+        )
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            metavar='ПАПКА=ВЕС',
+            help='Сценарий и его вес; по умолчанию все папки с весом 1'
+        )
+        parser.add_argument(
+            '--exclude', nargs='*', default=list(DEFAULT_EXCLUDE),
+            help='Папки, которые не попадают в сценарии по умолчанию'
+        )
+        parser.add_argument(
+            '--concurrency', default='1,2,4,8,16,32',
+            help='Ступени числа виртуальных пользователей через запятую'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=15.0,
+            help='Длительность каждой ступени, секунд'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30.0,
+            help='Таймаут одного запроса, секунд'
+        )
+        parser.add_argument(
+            '--start-server', action='store_true',
+            help='Запустить gunicorn локально на время прогона'
+        )
+        parser.add_argument(
+            '--throttling', action='store_true',
+            help='Не отключать троттлинг у запущенного сервера'
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--worker-class', default='sync')
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Запустить ASGI-приложение с uvicorn-воркерами '
+                 'и асинхронными представлениями чтения'
+        )
+
+    def handle(self, *args, **options):
+        folders, variables = load_collection(options['collection'])
+        base_url = options['base_url'] or variables.get(
+            'baseUrl', 'http://127.0.0.1:8000'
+        )
+        if urlsplit(base_url).scheme != 'http':
+            raise CommandError('Поддерживается только http.')
+        variables['baseUrl'] = base_url
+        scenarios, weights = self.select_scenarios(folders, options)
+        if not scenarios:
+            raise CommandError('Не найдено ни одного сценария.')
+        try:
+            steps = [
+                int(step) for step in options['concurrency'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('Ступени нагрузки должны быть числами.')
+
+        server = self.start_server(base_url, options)
+        try:
+            asyncio.run(self.replay(
+                folders, variables, scenarios, weights, steps, options
+            ))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    def select_scenarios(self, folders, options):
+        if options['scenario']:
+            weighted = {}
+            for spec in options['scenario']:
+                pattern, _, weight = spec.partition('=')
+                try:
+                    weighted[pattern] = float(weight or 1)
+                except ValueError:
+                    raise CommandError(f'Некорректный вес сценария: {spec}')
+            selected = [
+                (folder, weight)
+                for folder in folders
+                for pattern, weight in weighted.items()
+                if matches(folder, [pattern])
+            ]
+        else:
+            selected = [
+                (folder, 1.0) for folder in folders
+                if not matches(folder, options['exclude'])
+            ]
+        for folder, weight in selected:
+            self.stdout.write(f'Сценарий {folder}: вес {weight:g}')
+        return (
+            [folders[folder] for folder, _ in selected],
+            [weight for _, weight in selected],
+        )
+
+    def start_server(self, base_url, options):
+        if not options['start_server']:
+            return None
+        parts = urlsplit(base_url)
+        host, port = parts.hostname, parts.port or 80
+        application, worker_class = 'foodgram.wsgi', options['worker_class']
+        environment = dict(os.environ)
+        if not options['throttling']:
+            environment['THROTTLING'] = 'false'
+        if options['asgi']:
+            application = 'foodgram.asgi:application'
+            worker_class = 'uvicorn.workers.UvicornWorker'
+            environment['ASYNC_READ_VIEWS'] = 'true'
+        server = subprocess.Popen(
+            [
+                'gunicorn', application,
+                '--bind', f'{host}:{port}',
+                '--workers', str(options['workers']),
+                '--threads', str(options['threads']),
+                '--worker-class', worker_class,
+            ],
+            cwd=settings.BASE_DIR,
+            env=environment,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn завершился при запуске.')
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn не начал принимать соединения.')
+
+    async def replay(self, folders, variables, scenarios, weights, steps,
+                     options):
+        base_url = variables['baseUrl']
+        setup_user = VirtualUser(base_url, variables, None, options['timeout'])
+        for folder, requests in folders.items():
+            if not matches(folder, options['setup']):
+                continue
+            for request in requests:
+                status = await setup_user.send(request)
+                self.stdout.write(
+                    f'Подготовка {folder}/{request["name"]}: {status}'
+                )
+        await setup_user.connection.close()
+
+        results = []
+        for concurrency in steps:
+            stats = Stats()
+            deadline = time.monotonic() + options['duration']
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                VirtualUser(
+                    base_url, setup_user.variables, stats, options['timeout']
+                ).run(scenarios, weights, deadline)
+                for _ in range(concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+            results.append((concurrency, stats, elapsed))
+            self.report(concurrency, stats, elapsed)
+        self.report_saturation(results)
+
+    def report(self, concurrency, stats, elapsed):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\nПользователей: {concurrency}, '
+            f'запросов: {stats.total}, '
+            f'RPS: {stats.total / elapsed:.1f}'
+        ))
+        self.stdout.write(
+            f'{"Запрос":<60} {"кол-во":>7} {"RPS":>7} {"p50":>8} '
+            f'{"p95":>8} {"p99":>8} {"5xx":>6} {"4xx":>6}'
+        )
+        for name in sorted(stats.latencies):
+            latencies = stats.latencies[name]
+            count = len(latencies)
+            self.stdout.write(
+                f'{name[:60]:<60} {count:>7} {count / elapsed:>7.1f} '
+                f'{percentile(latencies, 0.5) * 1000:>7.1f}м '
+                f'{percentile(latencies, 0.95) * 1000:>7.1f}м '
+                f'{percentile(latencies, 0.99) * 1000:>7.1f}м '
+                f'{stats.errors[name] / count:>6.1%} '
+                f'{stats.client_errors[name] / count:>6.1%}'
+            )
+
+    def report_saturation(self, results):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nИтог по ступеням'))
+        best = None
+        saturation = None
+        for concurrency, stats, elapsed in results:
+            throughput = stats.total / elapsed
+            errors = sum(stats.errors.values()) / max(stats.total, 1)
+            self.stdout.write(
+                f'{concurrency:>5} польз.: {throughput:>8.1f} RPS, '
+                f'p95 {percentile(stats.all_latencies, 0.95) * 1000:.1f} мс, '
+                f'ошибок {errors:.1%}'
+            )
+            if best is not None and saturation is None and (
+                throughput < best * SATURATION_GAIN
+            ):
+                saturation = concurrency
+            best = max(best or 0.0, throughput)
+        if saturation is None:
+            self.stdout.write(self.style.WARNING(
+                'Насыщение не достигнуто, увеличьте число пользователей.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Пропускная способность перестала расти на {saturation} '
+                f'пользователях (максимум {best:.1f} RPS).'
+            ))
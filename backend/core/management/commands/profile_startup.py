@@ -0,0 +1,85 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+STARTUP_SCRIPT = '''
+import json
+import time
+
+started = time.perf_counter()
+import django
+django.setup()
+timings = [('django.setup', time.perf_counter() - started)]
+
+from core.warmup import STEPS, warm_up, warm_up_database
+timings += warm_up(STEPS) + warm_up_database()
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени импорта модулей и прогрева воркера '
+        'в отдельном процессе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'foodgram.settings'
+            ),
+            'WARM_UP_WORKERS': '',
+        }
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        modules = []
+        packages = defaultdict(int)
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+            if match:
+                own, cumulative, _, module = match.groups()
+                modules.append((module, int(own), int(cumulative)))
+                packages[module.split('.')[0]] += int(own)
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Импорт: {len(modules)} модулей, '
+            f'{sum(own for _, own, _ in modules) / 1000:.1f} мс'
+        ))
+        self.stdout.write('Самые долгие модули (собственное / с зависимыми):')
+        for module, own, cumulative in sorted(
+            modules, key=lambda row: row[1], reverse=True
+        )[:options['top']]:
+            self.stdout.write(
+                f'{own / 1000:>9.1f} {cumulative / 1000:>9.1f} мс  {module}'
+            )
+        self.stdout.write('Пакеты:')
+        for package, own in sorted(
+            packages.items(), key=lambda row: row[1], reverse=True
+        )[:options['top']]:
+            self.stdout.write(f'{own / 1000:>9.1f} мс  {package}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Прогрев'))
+        for name, seconds in timings:
+            self.stdout.write(f'{seconds * 1000:>9.1f} мс  {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Итого: {sum(seconds for _, seconds in timings) * 1000:.1f} мс'
+        ))
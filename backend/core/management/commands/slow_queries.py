@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import QueryStat, SlowQuery
+from core.querylog import query_log
+
+ORDERINGS = {
+    'total': '-total_time',
+    'calls': '-calls',
+    'max': '-max_time',
+    'mean': '-mean_time',
+}
+
+
+class Command(BaseCommand):
+    help = 'Самые затратные SQL-запросы по отпечаткам и представлениям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', choices=ORDERINGS, default='total')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--view', help='Только для этого представления')
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Показать последний сохраненный план для каждого запроса'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Удалить накопленную статистику и медленные запросы'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            QueryStat.objects.all().delete()
+            SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS('Статистика очищена'))
+            return
+        query_log.flush()
+        stats = QueryStat.objects.annotate(
+            mean_time=F('total_time') / F('calls')
+        ).order_by(ORDERINGS[options['by']])
+        if options['view']:
+            stats = stats.filter(view=options['view'])
+        for stat in stats[:options['limit']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{stat.total_time:10.1f} мс  {stat.calls:8} вызовов  '
+                f'среднее {stat.mean_time:.2f}  макс {stat.max_time:.1f}  '
+                f'{stat.view}  [{stat.fingerprint}]'
+            ))
+            self.stdout.write(f'    {stat.sql[:500]}')
+            if not options['plans']:
+                continue
+            slow = SlowQuery.objects.filter(
+                fingerprint=stat.fingerprint, view=stat.view
+            ).exclude(plan='').first()
+            if slow is not None:
+                self.stdout.write(
+                    f'    {"EXPLAIN ANALYZE" if slow.analyzed else "EXPLAIN"}'
+                    f' ({slow.duration:.1f} мс):'
+                )
+                for line in slow.plan.splitlines():
+                    self.stdout.write(f'      {line}')
@@ -0,0 +1,167 @@
+import hashlib
+import random
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .db_router import PRIMARY, choose_replica, read_database
+from .models import RequestProfile
+from .profiling import Profile, delete_profile, profile_trigger, save_profile
+from .querylog import current_request
+
+PIN_KEY = 'replica-pin:{}'
+
+
+def pin_keys(request):
+    keys = [f'ip:{BaseThrottle().get_ident(request)}']
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2:
+        keys.append(
+            'token:' + hashlib.sha256(header[1].encode()).hexdigest()
+        )
+    return [PIN_KEY.format(key) for key in keys]
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        keys, database = self.route(request)
+        token = read_database.set(database)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        self.pin(request, response, keys)
+        return response
+
+    async def __acall__(self, request):
+        keys, database = await sync_to_async(self.route)(request)
+        token = read_database.set(database)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        await sync_to_async(self.pin)(request, response, keys)
+        return response
+
+    def route(self, request):
+        keys = pin_keys(request)
+        if request.method not in SAFE_METHODS or caches[
+            settings.REPLICA_PIN_CACHE
+        ].get_many(keys):
+            return keys, PRIMARY
+        return keys, choose_replica()
+
+    def pin(self, request, response, keys):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            caches[settings.REPLICA_PIN_CACHE].set_many(
+                dict.fromkeys(keys, True), settings.REPLICA_PIN_SECONDS
+            )
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        with Profile() as profile:
+            response = self.get_response(request)
+        record = self.store(request, response, profile, trigger)
+        response['X-Profile-Id'] = str(record.pk)
+        return response
+
+    async def __acall__(self, request):
+        trigger = await sync_to_async(profile_trigger)(request)
+        if trigger is None:
+            return await self.get_response(request)
+        profile = Profile()
+        await sync_to_async(profile.attach)()
+        with profile:
+            response = await self.get_response(request)
+        record = await sync_to_async(self.store)(
+            request, response, profile, trigger
+        )
+        response['X-Profile-Id'] = str(record.pk)
+        return response
+
+    def store(self, request, response, profile, trigger):
+        user = getattr(request, 'user', None)
+        record = RequestProfile.objects.create(
+            name=save_profile(profile),
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            user=user if user and user.is_authenticated else None,
+            status_code=response.status_code,
+            duration=profile.duration,
+            samples=sum(profile.sampler.stacks.values()),
+            query_count=len(profile.recorder.queries),
+            query_time=sum(
+                query['duration'] for query in profile.recorder.queries
+            ),
+            trigger=trigger
+        )
+        stale = RequestProfile.objects.values_list('pk', 'name')[
+            settings.PROFILE_KEEP:
+        ]
+        for pk, name in list(stale):
+            delete_profile(name)
+            RequestProfile.objects.filter(pk=pk).delete()
+        return record
+
+
+class QueryLogMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.track(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = self.track(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    def track(self, request):
+        request.analyze_queries = (
+            random.random() < settings.SLOW_QUERY_ANALYZE_RATE
+        )
+        return current_request.set(request)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=16, verbose_name='Отпечаток')),
+                ('view', models.CharField(max_length=200, verbose_name='Представление')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('duration', models.FloatField(verbose_name='Время, мс')),
+                ('plan', models.TextField(blank=True, verbose_name='План')),
+                ('analyzed', models.BooleanField(default=False, verbose_name='EXPLAIN ANALYZE')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='QueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=16, verbose_name='Отпечаток')),
+                ('view', models.CharField(max_length=200, verbose_name='Представление')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('calls', models.PositiveBigIntegerField(default=0, verbose_name='Вызовов')),
+                ('total_time', models.FloatField(default=0, verbose_name='Всего, мс')),
+                ('max_time', models.FloatField(default=0, verbose_name='Максимум, мс')),
+                ('last_seen', models.DateTimeField(auto_now_add=True, verbose_name='Последний вызов')),
+            ],
+            options={
+                'verbose_name': 'Статистика запроса',
+                'verbose_name_plural': 'Статистика запросов',
+                'ordering': ('-total_time',),
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'view'), name='unique_query_stat')],
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    TRIGGERS = (
+        ('header', 'Заголовок'),
+        ('sampling', 'Выборка'),
+    )
+
+    name = models.CharField(max_length=32, unique=True, verbose_name='Файл')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата'
+    )
+    method = models.CharField(max_length=10, verbose_name='Метод')
+    path = models.CharField(max_length=2048, verbose_name='Путь')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Пользователь'
+    )
+    status_code = models.PositiveSmallIntegerField(verbose_name='Статус')
+    duration = models.FloatField(db_index=True, verbose_name='Время, мс')
+    samples = models.PositiveIntegerField(verbose_name='Сэмплов')
+    query_count = models.PositiveIntegerField(verbose_name='Запросов')
+    query_time = models.FloatField(verbose_name='Время запросов, мс')
+    trigger = models.CharField(
+        max_length=16,
+        choices=TRIGGERS,
+        verbose_name='Причина'
+    )
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
+
+
+class QueryStat(models.Model):
+    fingerprint = models.CharField(max_length=16, verbose_name='Отпечаток')
+    view = models.CharField(max_length=200, verbose_name='Представление')
+    sql = models.TextField(verbose_name='Запрос')
+    calls = models.PositiveBigIntegerField(default=0, verbose_name='Вызовов')
+    total_time = models.FloatField(default=0, verbose_name='Всего, мс')
+    max_time = models.FloatField(default=0, verbose_name='Максимум, мс')
+    last_seen = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Последний вызов'
+    )
+
+    class Meta:
+        ordering = ('-total_time',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('fingerprint', 'view'),
+                name='unique_query_stat'
+            ),
+        ]
+        verbose_name = 'Статистика запроса'
+        verbose_name_plural = 'Статистика запросов'
+
+    def __str__(self):
+        return self.sql[:100]
+
+
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(
+        max_length=16,
+        db_index=True,
+        verbose_name='Отпечаток'
+    )
+    view = models.CharField(max_length=200, verbose_name='Представление')
+    sql = models.TextField(verbose_name='Запрос')
+    duration = models.FloatField(verbose_name='Время, мс')
+    plan = models.TextField(blank=True, verbose_name='План')
+    analyzed = models.BooleanField(
+        default=False,
+        verbose_name='EXPLAIN ANALYZE'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата'
+    )
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return self.sql[:100]
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+class Sampler:
+    def __init__(self, interval):
+        self.thread_ids = set()
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                self.sample(frames.get(thread_id))
+
+    def sample(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                f'{code.co_name} ({code.co_filename}:'
+                f'{code.co_firstlineno})'.replace(';', ',')
+            )
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def folded(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'many': many,
+                'duration': (time.perf_counter() - started) * 1000,
+            })
+
+
+class Profile:
+    def __init__(self):
+        self.sampler = Sampler(settings.PROFILE_SAMPLE_INTERVAL)
+        self.recorder = QueryRecorder()
+        self.wrappers = ExitStack()
+        self.duration = 0
+
+    def attach(self):
+        self.sampler.thread_ids.add(threading.get_ident())
+        for connection in connections.all():
+            self.wrappers.enter_context(
+                connection.execute_wrapper(self.recorder)
+            )
+
+    def __enter__(self):
+        self.attach()
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        self.duration = (time.perf_counter() - self.started) * 1000
+        self.wrappers.close()
+
+
+@lru_cache
+def sampling_rules():
+    return [
+        (
+            re.compile(rule['path']),
+            rule.get('method'),
+            rule.get('rate', 1.0),
+        )
+        for rule in settings.PROFILE_SAMPLING_RULES
+    ]
+
+
+def request_user(request):
+    if request.user.is_authenticated:
+        return request.user
+    api_request = Request(request)
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(api_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+def profile_trigger(request):
+    if settings.PROFILE_HEADER in request.META:
+        user = request_user(request)
+        if user is not None and user.is_staff:
+            return 'header'
+    for path, method, rate in sampling_rules():
+        if (
+            path.search(request.path)
+            and method in (None, request.method)
+            and random.random() < rate
+        ):
+            return 'sampling'
+    return None
+
+
+def profile_path(name, extension):
+    return os.path.join(settings.PROFILE_ROOT, f'{name}.{extension}')
+
+
+def save_profile(profile):
+    name = uuid.uuid4().hex
+    os.makedirs(settings.PROFILE_ROOT, exist_ok=True)
+    with open(profile_path(name, 'folded'), 'w', encoding='utf-8') as file:
+        file.write(profile.sampler.folded())
+    with open(profile_path(name, 'json'), 'w', encoding='utf-8') as file:
+        json.dump(profile.recorder.queries, file, ensure_ascii=False)
+    return name
+
+
+def delete_profile(name):
+    for extension in ('folded', 'json'):
+        try:
+            os.unlink(profile_path(name, extension))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,165 @@
+import atexit
+import hashlib
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import QueryStat, SlowQuery
+
+QUOTED = re.compile(r"'(?:[^']|'')*'")
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+REPEATED_ROWS = re.compile(r'(\(\?\))(?:\s*,\s*\(\?\))+')
+WHITESPACE = re.compile(r'\s+')
+EXPLAINED = ('SELECT',)
+UNRESOLVED_VIEW = '<unresolved>'
+
+current_request = ContextVar('current_request', default=None)
+state = threading.local()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    normalized = IN_LISTS.sub(
+        '(?)', WHITESPACE.sub(' ', LITERALS.sub('?', sql)).strip()
+    )
+    normalized = REPEATED_ROWS.sub(r'\1, ...', normalized)
+    return hashlib.md5(normalized.encode()).hexdigest()[:16], normalized
+
+
+def view_name():
+    request = current_request.get()
+    if request is None:
+        return '-'
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.view_name[:QueryStat._meta.get_field('view').max_length]
+
+
+class QueryLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.slow = []
+        self.pid = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(state, 'busy', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(
+                context['connection'], sql, params, many,
+                (time.perf_counter() - started) * 1000
+            )
+
+    def record(self, connection, sql, params, many, duration):
+        key, normalized = fingerprint(sql)
+        view = view_name()
+        with self.lock:
+            entry = self.stats.setdefault(
+                (key, view), [normalized, 0, 0.0, 0.0]
+            )
+            entry[1] += 1
+            entry[2] += duration
+            entry[3] = max(entry[3], duration)
+        if duration < settings.SLOW_QUERY_THRESHOLD:
+            return
+        request = current_request.get()
+        analyze = bool(request and getattr(request, 'analyze_queries', False))
+        plan = None
+        if not many and sql.lstrip()[:6].upper() in EXPLAINED:
+            plan = self.explain(connection, sql, params, analyze)
+        with self.lock:
+            self.slow.append({
+                'fingerprint': key,
+                'view': view,
+                'sql': normalized,
+                'duration': duration,
+                'plan': QUOTED.sub('?', plan or ''),
+                'analyzed': analyze and plan is not None,
+            })
+
+    def explain(self, connection, sql, params, analyze):
+        state.busy = True
+        try:
+            try:
+                prefix = connection.ops.explain_query_prefix(analyze=analyze)
+            except ValueError:
+                prefix = connection.ops.explain_query_prefix()
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}', params)
+                    return '\n'.join(
+                        ' '.join(map(str, row)) for row in cursor.fetchall()
+                    )
+        except DatabaseError:
+            return None
+        finally:
+            state.busy = False
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self.run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            time.sleep(settings.QUERY_STATS_FLUSH_INTERVAL)
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        with self.lock:
+            stats, self.stats = self.stats, {}
+            slow, self.slow = self.slow, []
+        state.busy = True
+        try:
+            now = timezone.now()
+            for (key, view), (sql, calls, total, longest) in stats.items():
+                stat, _ = QueryStat.objects.get_or_create(
+                    fingerprint=key, view=view, defaults={'sql': sql}
+                )
+                QueryStat.objects.filter(pk=stat.pk).update(
+                    calls=F('calls') + calls,
+                    total_time=F('total_time') + total,
+                    max_time=Greatest('max_time', longest),
+                    last_seen=now
+                )
+            if slow:
+                SlowQuery.objects.bulk_create(
+                    SlowQuery(**query) for query in slow
+                )
+                oldest = SlowQuery.objects.order_by('-pk').values_list(
+                    'pk', flat=True
+                )[settings.SLOW_QUERY_KEEP:settings.SLOW_QUERY_KEEP + 1]
+                if oldest:
+                    SlowQuery.objects.filter(pk__lte=oldest[0]).delete()
+        except DatabaseError:
+            pass
+        finally:
+            state.busy = False
+
+
+query_log = QueryLog()
+
+
+def install(connection, **kwargs):
+    query_log.start()
+    if query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_log)
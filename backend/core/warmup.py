@@ -0,0 +1,89 @@
+import inspect
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import Resolver404, get_resolver
+from django.utils import translation
+
+WARM_UP_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/1/',
+    '/api/users/me/',
+    '/api/ingredients/',
+    '/s/1/',
+)
+WARM_UP_TEMPLATES = ('shopping_cart.txt',)
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for path in WARM_UP_PATHS:
+        try:
+            resolver.resolve(path)
+        except Resolver404:
+            pass
+
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Not found.')
+
+
+def warm_serializers():
+    from rest_framework.serializers import Serializer
+
+    from api import fast_serializers, serializers
+
+    for serializer_class in vars(serializers).values():
+        if (
+            inspect.isclass(serializer_class)
+            and issubclass(serializer_class, Serializer)
+            and serializer_class.__module__ == serializers.__name__
+        ):
+            serializer_class().fields
+    fast_serializers.FastRecipeSerializer
+
+
+def warm_templates():
+    for template_name in WARM_UP_TEMPLATES:
+        get_template(template_name)
+
+
+def warm_caches():
+    from recipe.ingredient_index import ingredient_index
+    from recipe.models import Tag
+
+    Tag.bits_by_slug()
+    ingredient_index.ensure_ready()
+
+
+STEPS = (
+    ('urls', warm_urls),
+    ('translations', warm_translations),
+    ('serializers', warm_serializers),
+    ('templates', warm_templates),
+)
+DATABASE_STEPS = (
+    ('caches', warm_caches),
+)
+
+
+def warm_up(steps):
+    timings = []
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def warm_up_database():
+    try:
+        return warm_up(DATABASE_STEPS)
+    except DatabaseError:
+        return []
+    finally:
+        connections.close_all()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -40,6 +41,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,8 +64,19 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
 
-if os.getenv('USE_SQLITE', '').lower() == 'true':
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', '').lower() == 'true'
+
+USE_SQLITE = os.getenv('USE_SQLITE', '').lower() == 'true'
+
+WARM_UP_WORKERS = os.getenv('WARM_UP_WORKERS', '').lower() == 'true'
+
+QUERY_LOG = os.getenv('QUERY_LOG', 'false').lower() == 'true'
+
+THROTTLING = os.getenv('THROTTLING', 'true').lower() == 'true'
+
+if USE_SQLITE:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -82,6 +95,35 @@ else:
         }
     }
 
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    if USE_SQLITE:
+        location = {'NAME': BASE_DIR / replica}
+    else:
+        host, _, port = replica.partition(':')
+        location = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        **location,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'core.middleware.ReplicaRoutingMiddleware')
+
+if QUERY_LOG:
+    MIDDLEWARE.insert(0, 'core.middleware.QueryLogMiddleware')
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_CACHE = 'shared'
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+REPLICA_HEALTH_INTERVAL = 10
+
 AUTH_USER_MODEL = 'recipe.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,12 +155,32 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+PROTECTED_URL = '/protected/'
+PROTECTED_ROOT = Path(os.getenv('PROTECTED_ROOT', BASE_DIR / 'protected'))
+ACCEL_REDIRECT = os.getenv('ACCEL_REDIRECT', '').lower() == 'true'
+
+PROFILE_ROOT = Path(os.getenv('PROFILE_ROOT', BASE_DIR / 'profiles'))
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_KEEP = 500
+PROFILE_SAMPLING_RULES = []
+
+QUERY_STATS_FLUSH_INTERVAL = 30
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 200))
+SLOW_QUERY_ANALYZE_RATE = 0.01
+SLOW_QUERY_KEEP = 1000
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -129,10 +191,77 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
 
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.AnonBucketThrottle',
+        'api.throttling.UserBucketThrottle',
+        'api.throttling.ScopedBucketThrottle',
+    ] if THROTTLING else [],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '120/minute',
+        'user': '300/minute',
+        'ingredients': '60/minute',
+        'subscriptions': '30/minute',
+        'shopping_cart': '10/minute',
+    },
+    'NUM_PROXIES': 1,
+
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 }
 
+THROTTLE_STORE_PATH = os.getenv(
+    'THROTTLE_STORE_PATH',
+    os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+        'foodgram-throttle'
+    )
+)
+THROTTLE_STORE_SLOTS = 65536
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'SHARED_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram-cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+TIERED_CACHE_ALIAS = 'shared'
+TIERED_CACHE_SIZE = 1000
+TIERED_CACHE_LOCAL_TTL = 5
+TIERED_CACHE_LOCK_TIMEOUT = 10
+TIERED_CACHE_BETA = 1.0
+
+COUNT_ESTIMATE_THRESHOLD = 10000
+
+TOKEN_CACHE = 'shared'
+MEMBERSHIP_CACHE = 'shared'
+TAG_BITS_CACHE = 'shared'
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_LOCAL_TTL = 5
+
+FEED_FANOUT_LIMIT = 10000
+FEED_FANOUT_BATCH = 1000
+FEED_BACKFILL_SIZE = 50
+
+SCORE_FAVORITE_WEIGHT = 1.0
+SCORE_CART_WEIGHT = 2.0
+TRENDING_HALF_LIFE_HOURS = 72
+
+SIMILAR_RECIPES_COUNT = 10
+SIMILAR_FAVORITE_WEIGHT = 1.0
+SIMILAR_CART_WEIGHT = 1.0
+SIMILAR_INGREDIENT_WEIGHT = 0.5
+
+PURGE_BATCH_SIZE = 500
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'USER_CREATE_PASSWORD_RETYPE': True,
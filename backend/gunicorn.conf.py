@@ -0,0 +1,20 @@
+import os
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '').lower() == 'true'
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if settings.WARM_UP_WORKERS:
+        from core.warmup import warm_up_database
+
+        warm_up_database()
@@ -13,6 +13,59 @@ from .models import (
     User,
     Subscription,
 )
+from .exports import count_by, csv_response, join_by
+from .purge import delete_recipes, delete_users
+from core.cache import tiered_cache
+
+THRESHOLDS_CACHE_KEY = 'admin:cooking-time-thresholds'
+THRESHOLDS_CACHE_TIMEOUT = 60
+
+
+class SoftDeleteAdminMixin:
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(
+            request, self.model._default_manager.filter(pk=obj.pk)
+        )
+
+
+class CSVExportMixin:
+    actions = ('export_csv',)
+    csv_fields = None
+    csv_columns = ()
+
+    @admin.action(description='Выгрузить в CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return csv_response(
+            queryset,
+            self.csv_fields or [
+                field.attname for field in self.model._meta.concrete_fields
+            ],
+            [getattr(self, name) for name in self.csv_columns],
+            f'{self.model._meta.model_name}.csv'
+        )
+
+
+def cooking_time_thresholds(recipes):
+    times = list(recipes.values_list('cooking_time', flat=True))
+    if len(set(times)) < 3:
+        return None
+    times_sorted = sorted(times)
+    times_count = len(times_sorted)
+    first_threshold = times_sorted[times_count // 3]
+    second_threshold = times_sorted[2 * times_count // 3]
+    return (
+        first_threshold,
+        second_threshold,
+        sum(cooking_time <= first_threshold for cooking_time in times),
+        sum(
+            first_threshold < cooking_time <= second_threshold
+            for cooking_time in times
+        ),
+        sum(cooking_time > second_threshold for cooking_time in times),
+    )
 
 
 class CookingTimeListFilter(admin.SimpleListFilter):
@@ -20,25 +73,19 @@ class CookingTimeListFilter(admin.SimpleListFilter):
     parameter_name = 'cooking_time'
 
     def lookups(self, request, model_admin):
-        qs = model_admin.get_queryset(request)
-        times = list(qs.values_list('cooking_time', flat=True))
-        if len(set(times)) < 3:
-            return []
-        times_sorted = sorted(times)
-        times_count = len(times_sorted)
-        self.first_threshold = times_sorted[times_count // 3]
-        self.second_threshold = times_sorted[2 * times_count // 3]
-
-        fast_recipes_count = sum(
-            cooking_time <= self.first_threshold for cooking_time in times
-        )
-        medium_recipes_count = sum(
-            self.first_threshold < cooking_time <= self.second_threshold
-            for cooking_time in times
-        )
-        slow_recipes_count = sum(
-            cooking_time > self.second_threshold for cooking_time in times
+        thresholds = tiered_cache.get_or_set(
+            THRESHOLDS_CACHE_KEY,
+            lambda: cooking_time_thresholds(
+                model_admin.get_queryset(request)
+            ),
+            THRESHOLDS_CACHE_TIMEOUT
         )
+        if thresholds is None:
+            return []
+        (
+            self.first_threshold, self.second_threshold,
+            fast_recipes_count, medium_recipes_count, slow_recipes_count
+        ) = thresholds
 
         return [
             (
@@ -93,7 +140,7 @@ class IngredientInRecipeInline(admin.TabularInline):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteAdminMixin, CSVExportMixin, admin.ModelAdmin):
     search_fields = ('name', 'author__username', 'tags__name')
     list_filter = ('tags', 'author', CookingTimeListFilter)
     list_display = (
@@ -106,6 +153,12 @@ class RecipeAdmin(admin.ModelAdmin):
         'image_tag',
     )
     inlines = (IngredientInRecipeInline,)
+    csv_fields = (
+        'id', 'name', 'author__username', 'cooking_time', 'published_at'
+    )
+    csv_columns = (
+        'csv_tags', 'csv_ingredients', 'csv_favorites', 'csv_shopping_carts'
+    )
 
     @admin.display(description='Продукты')
     @mark_safe
@@ -132,20 +185,55 @@ class RecipeAdmin(admin.ModelAdmin):
     def favorites_count(self, recipe):
         return recipe.favorites.count()
 
+    def delete_queryset(self, request, queryset):
+        delete_recipes(queryset)
+
+    @admin.display(description='Теги')
+    def csv_tags(self, ids):
+        return join_by(Recipe.tags.through.objects.filter(
+            recipe_id__in=ids
+        ).values_list('recipe_id', 'tag__name'))
+
+    @admin.display(description='Продукты')
+    def csv_ingredients(self, ids):
+        return join_by(
+            (recipe_id, f'{name} ({amount} {unit})')
+            for recipe_id, name, amount, unit
+            in IngredientInRecipe.objects.filter(
+                recipe_id__in=ids
+            ).values_list(
+                'recipe_id', 'ingredient__name', 'amount',
+                'ingredient__measurement_unit'
+            )
+        )
+
+    @admin.display(description='В избранном')
+    def csv_favorites(self, ids):
+        return count_by(Favorite.objects, 'recipe_id', ids)
+
+    @admin.display(description='В списках покупок')
+    def csv_shopping_carts(self, ids):
+        return count_by(ShoppingCart.objects, 'recipe_id', ids)
+
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(CSVExportMixin, admin.ModelAdmin):
     search_fields = ('name', 'measurement_unit')
     list_display = ('id', 'name', 'measurement_unit', 'recipes_count')
     list_filter = ('measurement_unit', InRecipeListFilter)
+    csv_columns = ('csv_recipes',)
 
     @admin.display(description='Рецептов')
     def recipes_count(self, ingredient):
         return ingredient.recipes.count()
 
+    @admin.display(description='Рецептов')
+    def csv_recipes(self, ids):
+        return count_by(IngredientInRecipe.objects, 'ingredient_id', ids)
+
 
 @admin.register(Tag)
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(CSVExportMixin, admin.ModelAdmin):
     search_fields = ('name', 'slug')
     list_display = (
         'id',
@@ -160,28 +248,31 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(CSVExportMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
     list_filter = ('user', 'recipe')
+    csv_fields = ('id', 'user__username', 'recipe__name', 'created_at')
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(CSVExportMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
     list_filter = ('user', 'recipe')
+    csv_fields = ('id', 'user__username', 'recipe__name', 'created_at')
 
 
 @admin.register(IngredientInRecipe)
-class IngredientInRecipeAdmin(admin.ModelAdmin):
+class IngredientInRecipeAdmin(CSVExportMixin, admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount')
     search_fields = ('recipe__name', 'ingredient__name')
     list_filter = ('recipe',)
+    csv_fields = ('id', 'recipe__name', 'ingredient__name', 'amount')
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, CSVExportMixin, BaseUserAdmin):
     search_fields = ('username', 'email')
     list_display = (
         'id', 'username', 'full_name', 'email', 'avatar_tag',
@@ -193,6 +284,11 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         (None, {'fields': ('avatar',)}),
     )
+    csv_fields = (
+        'id', 'username', 'email', 'first_name', 'last_name',
+        'is_active', 'date_joined', 'followers_count',
+    )
+    csv_columns = ('csv_recipes', 'csv_subscriptions')
 
     @admin.display(description='ФИ')
     def full_name(self, user):
@@ -220,12 +316,27 @@ class UserAdmin(BaseUserAdmin):
     def subscriptions_of_authors_count(self, user):
         return user.subscriptions_of_authors.count()
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(deleted_at__isnull=True)
+
+    @admin.display(description='Рецептов')
+    def csv_recipes(self, ids):
+        return count_by(Recipe.objects, 'author_id', ids)
+
+    @admin.display(description='Подписок')
+    def csv_subscriptions(self, ids):
+        return count_by(Subscription.objects, 'user_id', ids)
+
+    def delete_queryset(self, request, queryset):
+        delete_users(queryset)
+
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(CSVExportMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'author')
     search_fields = ('user__username', 'author__username')
     list_filter = ('user', 'author')
+    csv_fields = ('id', 'user__username', 'author__username')
 
 
 admin.site.unregister(Group)
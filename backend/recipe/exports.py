@@ -0,0 +1,74 @@
+import csv
+from collections import defaultdict
+
+from django.contrib.admin.utils import get_fields_from_path
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils.text import capfirst
+
+from .feed import batched
+
+CSV_CHUNK_SIZE = 2000
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def count_by(queryset, field, ids):
+    counts = dict(
+        queryset.filter(**{f'{field}__in': ids}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values_list(field, 'total')
+    )
+    return {pk: counts.get(pk, 0) for pk in ids}
+
+
+def join_by(rows):
+    values = defaultdict(list)
+    for key, value in rows:
+        values[key].append(value)
+    return {key: '; '.join(items) for key, items in values.items()}
+
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def field_label(model, path):
+    return ': '.join(
+        capfirst(str(field.verbose_name))
+        for field in get_fields_from_path(model, path)
+    )
+
+
+def csv_rows(queryset, fields, columns, chunk_size):
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow([
+        *(field_label(queryset.model, field) for field in fields),
+        *(column.short_description for column in columns),
+    ])
+    rows = queryset.order_by('pk').values_list('pk', *fields)
+    for chunk in batched(rows.iterator(chunk_size=chunk_size), chunk_size):
+        ids = [row[0] for row in chunk]
+        values = [column(ids) for column in columns]
+        yield ''.join(
+            writer.writerow([
+                csv_cell(value) for value in (
+                    *row[1:], *(column.get(row[0], '') for column in values)
+                )
+            ])
+            for row in chunk
+        )
+
+
+def csv_response(queryset, fields, columns, filename):
+    return StreamingHttpResponse(
+        csv_rows(queryset, fields, columns, CSV_CHUNK_SIZE),
+        content_type='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
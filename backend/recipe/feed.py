@@ -0,0 +1,129 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+
+from .models import Recipe, Subscription, TimelineEntry, User
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed')
+
+
+def run_in_background(function, *args):
+    def task():
+        close_old_connections()
+        try:
+            function(*args)
+        finally:
+            close_old_connections()
+
+    transaction.on_commit(lambda: executor.submit(task))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def is_popular(author_id):
+    return User.objects.filter(
+        pk=author_id,
+        followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'published_at'
+    ).first()
+    if recipe is None or is_popular(recipe['author_id']):
+        return
+    followers = Subscription.objects.filter(
+        author_id=recipe['author_id']
+    ).order_by('id').values_list('user_id', flat=True)
+    for batch in batched(
+        followers.iterator(chunk_size=settings.FEED_FANOUT_BATCH),
+        settings.FEED_FANOUT_BATCH
+    ):
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=recipe['author_id'],
+                    published_at=recipe['published_at']
+                )
+                for user_id in batch
+            ),
+            ignore_conflicts=True
+        )
+
+
+def backfill(user_id, author_id):
+    if is_popular(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-published_at', '-id'
+    ).values_list('id', 'published_at')[:settings.FEED_BACKFILL_SIZE]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                published_at=published_at
+            )
+            for recipe_id, published_at in recipes
+        ),
+        ignore_conflicts=True
+    )
+
+
+def encode_cursor(published_at, recipe_id):
+    return base64.urlsafe_b64encode(
+        f'{published_at.isoformat()}|{recipe_id}'.encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        published_at, recipe_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split('|')
+        return datetime.fromisoformat(published_at), int(recipe_id)
+    except ValueError:
+        return None
+
+
+def before(cursor, date_field, id_field):
+    published_at, recipe_id = cursor
+    return Q(**{f'{date_field}__lt': published_at}) | Q(**{
+        date_field: published_at, f'{id_field}__lt': recipe_id
+    })
+
+
+def read_feed(user, limit, cursor=None):
+    entries = TimelineEntry.objects.filter(user=user)
+    pulled = Recipe.objects.filter(author__in=User.objects.filter(
+        subscriptions_of_authors__user=user,
+        followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ))
+    if cursor is not None:
+        entries = entries.filter(before(cursor, 'published_at', 'recipe_id'))
+        pulled = pulled.filter(before(cursor, 'published_at', 'id'))
+    rows = sorted(
+        set(entries.order_by('-published_at', '-recipe_id').values_list(
+            'published_at', 'recipe_id'
+        )[:limit + 1])
+        | set(pulled.order_by('-published_at', '-id').values_list(
+            'published_at', 'id'
+        )[:limit + 1]),
+        reverse=True
+    )
+    page = rows[:limit]
+    next_cursor = encode_cursor(*page[-1]) if len(rows) > limit else None
+    return [recipe_id for _, recipe_id in page], next_cursor
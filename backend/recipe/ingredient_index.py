@@ -0,0 +1,205 @@
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from core.cache import tiered_cache
+from .models import IngredientInRecipe
+
+SYNC_INTERVAL = 5
+INDEX_NAMESPACE = 'ingredient-index'
+CHUNK_SIZE = 10000
+EMPTY = np.empty(0, dtype=np.int32)
+
+
+def load_rows(rows):
+    return np.fromiter(
+        itertools.chain.from_iterable(
+            rows.values_list('id', 'recipe_id', 'ingredient_id').iterator(
+                chunk_size=CHUNK_SIZE
+            )
+        ),
+        dtype=np.int64
+    ).reshape(-1, 3)
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.recipe_ids = None
+        self.totals = None
+        self.postings = {}
+        self.ingredients = []
+        self.last_row_id = 0
+        self.synced_at = 0.0
+        self.version = None
+
+    def build(self):
+        self.version = tiered_cache.version(INDEX_NAMESPACE)
+        rows = load_rows(IngredientInRecipe.objects.filter(
+            recipe__deleted_at__isnull=True
+        ).order_by())
+        recipe_ids = np.unique(rows[:, 1])
+        positions = np.searchsorted(recipe_ids, rows[:, 1]).astype(np.int32)
+        by_recipe = np.argsort(positions, kind='stable')
+        self.ingredients = np.split(
+            rows[by_recipe, 2],
+            np.flatnonzero(np.diff(positions[by_recipe])) + 1
+        ) if len(rows) else []
+        order = np.lexsort((positions, rows[:, 2]))
+        ingredients = rows[order, 2]
+        bounds = np.flatnonzero(np.diff(ingredients)) + 1
+        self.recipe_ids = recipe_ids
+        self.totals = np.bincount(
+            positions, minlength=len(recipe_ids)
+        ).astype(np.int32)
+        self.postings = {
+            int(chunk[0]): positions_chunk
+            for chunk, positions_chunk in zip(
+                np.split(ingredients, bounds),
+                np.split(positions[order], bounds)
+            )
+            if len(chunk)
+        }
+        self.last_row_id = int(rows[:, 0].max()) if len(rows) else 0
+        self.synced_at = time.monotonic()
+
+    def ensure_ready(self):
+        with self.lock:
+            if self.recipe_ids is None:
+                self.build()
+            elif time.monotonic() - self.synced_at >= SYNC_INTERVAL:
+                self.sync()
+
+    def sync(self):
+        if tiered_cache.version(INDEX_NAMESPACE) != self.version:
+            self.build()
+            return
+        rows = load_rows(IngredientInRecipe.objects.filter(
+            id__gt=self.last_row_id, recipe__deleted_at__isnull=True
+        ))
+        self.synced_at = time.monotonic()
+        if not len(rows):
+            return
+        self.last_row_id = int(rows[:, 0].max())
+        changed = np.unique(rows[:, 1])
+        current = load_rows(
+            IngredientInRecipe.objects.filter(recipe_id__in=changed.tolist())
+        )
+        for recipe_id in changed.tolist():
+            self.update_recipe(
+                recipe_id,
+                current[current[:, 1] == recipe_id, 2].tolist()
+            )
+
+    def position(self, recipe_id):
+        position = int(np.searchsorted(self.recipe_ids, recipe_id))
+        if (
+            position < len(self.recipe_ids)
+            and self.recipe_ids[position] == recipe_id
+        ):
+            return position
+        if position < len(self.recipe_ids):
+            return None
+        self.recipe_ids = np.append(self.recipe_ids, recipe_id)
+        self.totals = np.append(self.totals, np.int32(0))
+        self.ingredients.append(EMPTY)
+        return position
+
+    def discard(self, position):
+        for ingredient_id in self.ingredients[position].tolist():
+            postings = self.postings[ingredient_id]
+            found = np.searchsorted(postings, position)
+            if found < len(postings) and postings[found] == position:
+                self.postings[ingredient_id] = np.delete(postings, found)
+        self.ingredients[position] = EMPTY
+        self.totals[position] = 0
+
+    def update_recipe(self, recipe_id, ingredient_ids):
+        with self.lock:
+            if self.recipe_ids is None:
+                return
+            position = self.position(recipe_id)
+            if position is None:
+                self.recipe_ids = None
+                return
+            self.discard(position)
+            ingredient_ids = sorted(set(ingredient_ids))
+            for ingredient_id in ingredient_ids:
+                postings = self.postings.get(ingredient_id, EMPTY)
+                self.postings[ingredient_id] = np.insert(
+                    postings, np.searchsorted(postings, position), position
+                )
+            self.ingredients[position] = np.array(
+                ingredient_ids, dtype=np.int64
+            )
+            self.totals[position] = len(ingredient_ids)
+
+    def remove_recipes(self, recipe_ids):
+        tiered_cache.invalidate(INDEX_NAMESPACE)
+        with self.lock:
+            if self.recipe_ids is None:
+                return
+            for recipe_id in recipe_ids:
+                position = int(np.searchsorted(self.recipe_ids, recipe_id))
+                if (
+                    position < len(self.recipe_ids)
+                    and self.recipe_ids[position] == recipe_id
+                ):
+                    self.discard(position)
+
+    def rank(self, ingredient_ids):
+        self.ensure_ready()
+        with self.lock:
+            postings = [
+                self.postings[ingredient_id]
+                for ingredient_id in set(ingredient_ids)
+                if ingredient_id in self.postings
+            ]
+            if not postings:
+                return Ranking(EMPTY, EMPTY, EMPTY)
+            covered = np.bincount(
+                np.concatenate(postings), minlength=len(self.recipe_ids)
+            )
+            candidates = np.flatnonzero(covered)
+            return Ranking(
+                self.recipe_ids[candidates],
+                covered[candidates],
+                self.totals[candidates]
+            )
+
+
+class Ranking:
+    def __init__(self, recipe_ids, covered, totals):
+        self.recipe_ids = recipe_ids
+        self.covered = covered
+        self.missing = totals - covered
+        self.share = covered / np.maximum(totals, 1)
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def __getitem__(self, items):
+        limit = min(items.stop, len(self))
+        if limit <= 0:
+            return []
+        top = np.arange(len(self))
+        if limit < len(self):
+            key = -self.share + self.missing * 1e-6
+            boundary = np.partition(key, limit - 1)[limit - 1]
+            top = np.flatnonzero(key <= boundary)
+        order = top[np.lexsort((
+            -self.recipe_ids[top], self.missing[top], -self.share[top]
+        ))][:limit]
+        return [
+            (int(recipe_id), int(covered), int(missing))
+            for recipe_id, covered, missing in zip(
+                self.recipe_ids[order],
+                self.covered[order],
+                self.missing[order]
+            )
+        ][items]
+
+
+ingredient_index = IngredientIndex()
@@ -2,9 +2,12 @@ import json
 
 from django.core.management.base import BaseCommand
 
+from core.cache import tiered_cache
+
 
 class BaseImportFixtureCommand(BaseCommand):
     model = None
+    cache_namespace = None
     help = 'Импорт данных из JSON-фикстуры'
 
     def add_arguments(self, parser):
@@ -22,6 +25,8 @@ class BaseImportFixtureCommand(BaseCommand):
                     (self.model(**obj) for obj in json.load(f)),
                     ignore_conflicts=True
                 )
+            if self.cache_namespace:
+                tiered_cache.invalidate(self.cache_namespace)
             self.stdout.write(self.style.SUCCESS(
                 f'Импортировано {len(created)} объектов модели '
                 f'{self.model.__name__}'
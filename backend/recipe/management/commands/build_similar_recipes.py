@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipe.similarity import build_neighbours
+
+
+class Command(BaseCommand):
+    help = (
+        'Расчет похожих рецептов по общим избранным, корзинам '
+        'и продуктам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.SIMILAR_RECIPES_COUNT
+        )
+        parser.add_argument(
+            '--memory-mb',
+            type=int,
+            default=64,
+            help='Размер блока матрицы сходства в мегабайтах'
+        )
+        parser.add_argument(
+            '--max-feature-share',
+            type=float,
+            default=0.1,
+            help=(
+                'Признаки, встречающиеся у большей доли рецептов, '
+                'не учитываются'
+            )
+        )
+
+    def handle(self, *args, **options):
+        total = build_neighbours(
+            options['top_k'],
+            options['memory_mb'] * 1024 * 1024,
+            options['max_feature_share']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {total}'
+        ))
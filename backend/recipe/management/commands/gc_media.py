@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from recipe.feed import batched
+from recipe.media import find_orphans
+
+
+def remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление файлов из MEDIA_ROOT, на которые не ссылается '
+        'ни одна запись в базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directories',
+            nargs='*',
+            help='Каталоги внутри MEDIA_ROOT, по умолчанию каталоги загрузки'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Не трогать файлы моложе указанного числа часов'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        orphans = find_orphans(
+            options['directories'],
+            options['chunk_size'],
+            options['min_age'] * 3600
+        )
+        count = size = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for batch in batched(orphans, options['chunk_size']):
+                if options['dry_run']:
+                    for name, _, _ in batch:
+                        self.stdout.write(name)
+                    removed = [True] * len(batch)
+                else:
+                    removed = executor.map(
+                        remove, [path for _, path, _ in batch]
+                    )
+                for (_, _, file_size), done in zip(batch, removed):
+                    if done:
+                        count += 1
+                        size += file_size
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Найдено" if options["dry_run"] else "Удалено"} файлов: '
+            f'{count}, {size / 2 ** 20:.1f} МБ'
+        ))
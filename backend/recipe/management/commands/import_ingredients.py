@@ -1,6 +1,7 @@
-from recipe.models import Ingredient
+from recipe.models import INGREDIENTS_CACHE_NAMESPACE, Ingredient
 from .base_import_fixture import BaseImportFixtureCommand
 
 
 class Command(BaseImportFixtureCommand):
     model = Ingredient
+    cache_namespace = INGREDIENTS_CACHE_NAMESPACE
@@ -1,6 +1,7 @@
-from recipe.models import Tag
+from recipe.models import TAGS_CACHE_NAMESPACE, Tag
 from .base_import_fixture import BaseImportFixtureCommand
 
 
 class Command(BaseImportFixtureCommand):
     model = Tag
+    cache_namespace = TAGS_CACHE_NAMESPACE
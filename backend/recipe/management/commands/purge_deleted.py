@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipe.models import Recipe, User
+from recipe.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Окончательное удаление помеченных удаленными рецептов и '
+        'пользователей, если фоновая очистка была прервана'
+    )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.all_objects.filter(deleted_at__isnull=False).count()
+        users = User.objects.filter(deleted_at__isnull=False).count()
+        purge_deleted()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено рецептов: {recipes}, пользователей: {users}'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipe.feed import backfill
+from recipe.models import Subscription
+
+
+class Command(BaseCommand):
+    help = 'Заполнение лент подписчиков последними рецептами авторов'
+
+    def handle(self, *args, **options):
+        subscriptions = Subscription.objects.order_by('id').values_list(
+            'user_id', 'author_id'
+        )
+        total = 0
+        for user_id, author_id in subscriptions.iterator():
+            backfill(user_id, author_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано подписок: {total}'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipe.models import Recipe
+from recipe.scores import refresh_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет популярности и рейтинга трендов для рецептов '
+        'с новыми добавлениями в избранное и корзину'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рецепты, например после смены весов'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            Recipe.objects.update(score_stale=True)
+        refreshed = refresh_scores(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {refreshed}'
+        ))
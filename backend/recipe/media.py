@@ -0,0 +1,84 @@
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from .feed import batched
+
+
+def file_fields():
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def upload_directories(fields):
+    return sorted({
+        field.upload_to.strip('/')
+        for _, field in fields
+        if isinstance(field.upload_to, str) and field.upload_to.strip('/')
+    })
+
+
+def scan(directory):
+    stack = [directory]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def referenced(fields, names):
+    return sorted({
+        name
+        for model, field in fields
+        for name in model._base_manager.filter(**{
+            f'{field.attname}__in': names
+        }).values_list(field.attname, flat=True)
+    })
+
+
+def merge_orphans(files, references):
+    references = iter(references)
+    reference = next(references, None)
+    for name, entry in files:
+        while reference is not None and reference < name:
+            reference = next(references, None)
+        if reference != name:
+            yield name, entry
+
+
+def find_orphans(directories=None, chunk_size=500, min_age=0):
+    root = str(settings.MEDIA_ROOT)
+    fields = file_fields()
+    deadline = time.time() - min_age
+    for directory in directories or upload_directories(fields):
+        for chunk in batched(scan(os.path.join(root, directory)), chunk_size):
+            files = sorted(
+                (
+                    os.path.relpath(entry.path, root).replace(os.sep, '/'),
+                    entry
+                )
+                for entry in chunk
+            )
+            for name, entry in merge_orphans(
+                files, referenced(fields, [name for name, _ in files])
+            ):
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime <= deadline:
+                    yield name, entry.path, stat.st_size
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    Recipe.objects.update(updated_at=models.F('published_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_feed_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -6,6 +9,13 @@ from django.core.validators import RegexValidator
 
 COOKING_TIME_MIN_VALUE = 1
 INGREDIENT_AMOUNT_MIN_VALUE = 1
+TAG_BITS_LIMIT = 63
+TAG_BITS_CACHE_KEY = 'tag-bits'
+TAG_BITS_CACHE_TIMEOUT = 60
+TAGS_CACHE_NAMESPACE = 'tags'
+INGREDIENTS_CACHE_NAMESPACE = 'ingredients'
+SUBSCRIPTIONS_CACHE_NAMESPACE = 'subscriptions:{}'
+COUNTS_CACHE_NAMESPACE = 'counts:{}'
 
 
 class User(AbstractUser):
@@ -18,6 +28,7 @@ class User(AbstractUser):
         upload_to='users/',
         blank=True,
         null=True,
+        db_index=True,
         verbose_name='Аватар'
     )
     username = models.CharField(
@@ -38,6 +49,18 @@ class User(AbstractUser):
         max_length=150,
         verbose_name='Фамилия'
     )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписчиков'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Дата удаления'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
@@ -79,6 +102,55 @@ class Subscription(models.Model):
         return f'{self.user.username} подписан на {self.author.username}'
 
 
+def tag_bits_cache():
+    return caches[settings.TAG_BITS_CACHE]
+
+
+def free_tag_bits(count):
+    used = set(Tag.objects.values_list('bit', flat=True))
+    bits = [bit for bit in range(TAG_BITS_LIMIT) if bit not in used]
+    if len(bits) < count:
+        raise ValidationError(
+            f'Нельзя создать больше {TAG_BITS_LIMIT} тегов.'
+        )
+    return bits[:count]
+
+
+class TagManager(models.Manager):
+    def bulk_create(self, objs, *args, ignore_conflicts=False, **kwargs):
+        objs = list(objs)
+        if ignore_conflicts:
+            objs = self.without_conflicts(objs)
+        new_tags = [tag for tag in objs if tag.bit is None]
+        for tag, bit in zip(new_tags, free_tag_bits(len(new_tags))):
+            tag.bit = bit
+        created = super().bulk_create(
+            objs, *args, ignore_conflicts=ignore_conflicts, **kwargs
+        )
+        tag_bits_cache().delete(TAG_BITS_CACHE_KEY)
+        return created
+
+    def without_conflicts(self, tags):
+        taken = {
+            field: set(self.values_list(field, flat=True))
+            for field in ('name', 'slug', 'bit')
+        }
+        unique = []
+        for tag in tags:
+            values = {
+                field: getattr(tag, field) for field in ('name', 'slug', 'bit')
+            }
+            if any(
+                value is not None and value in taken[field]
+                for field, value in values.items()
+            ):
+                continue
+            for field, value in values.items():
+                taken[field].add(value)
+            unique.append(tag)
+        return unique
+
+
 class Tag(models.Model):
     name = models.CharField(
         max_length=32,
@@ -90,6 +162,13 @@ class Tag(models.Model):
         unique=True,
         verbose_name='Слаг'
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        editable=False,
+        verbose_name='Бит в маске тегов'
+    )
+
+    objects = TagManager()
 
     class Meta:
         ordering = ('name',)
@@ -99,6 +178,26 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit, = free_tag_bits(1)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bits_by_slug(cls):
+        bits = tag_bits_cache().get(TAG_BITS_CACHE_KEY)
+        if bits is None:
+            bits = dict(cls.objects.values_list('slug', 'bit'))
+            tag_bits_cache().set(
+                TAG_BITS_CACHE_KEY, bits, TAG_BITS_CACHE_TIMEOUT
+            )
+        return bits
+
+    @classmethod
+    def mask_for_slugs(cls, slugs):
+        bits = cls.bits_by_slug()
+        return sum(1 << bits[slug] for slug in set(slugs) if slug in bits)
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -125,6 +224,11 @@ class Ingredient(models.Model):
         return f'{self.name} ({self.measurement_unit})'
 
 
+class RecipeManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -132,7 +236,11 @@ class Recipe(models.Model):
         verbose_name='Автор'
     )
     name = models.CharField(max_length=256, verbose_name='Название рецепта')
-    image = models.ImageField(upload_to='recipes/', verbose_name='Изображение')
+    image = models.ImageField(
+        upload_to='recipes/',
+        db_index=True,
+        verbose_name='Изображение'
+    )
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.PositiveIntegerField(
         verbose_name='Время приготовления (минуты)',
@@ -146,6 +254,11 @@ class Recipe(models.Model):
         Tag,
         verbose_name='Теги'
     )
+    tags_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Маска тегов'
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         through='IngredientInRecipe',
@@ -156,9 +269,53 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    popularity = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг трендов'
+    )
+    score_stale = models.BooleanField(
+        default=False,
+        editable=False,
+        db_index=True,
+        verbose_name='Рейтинг требует пересчета'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Дата удаления'
+    )
+
+    objects = RecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-published_at',)
+        indexes = [
+            models.Index(
+                fields=('author', '-published_at', '-id'),
+                name='recipe_author_published_idx'
+            ),
+            models.Index(
+                fields=('-popularity', '-id'),
+                name='recipe_popularity_idx'
+            ),
+            models.Index(
+                fields=('-trending_score', '-id'),
+                name='recipe_trending_idx'
+            ),
+        ]
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
@@ -166,6 +323,12 @@ class Recipe(models.Model):
     def __str__(self):
         return self.name
 
+    def update_tags_mask(self):
+        self.tags_mask = sum(
+            1 << bit for bit in self.tags.values_list('bit', flat=True)
+        )
+        Recipe.objects.filter(pk=self.pk).update(tags_mask=self.tags_mask)
+
 
 class IngredientInRecipe(models.Model):
     recipe = models.ForeignKey(
@@ -210,6 +373,10 @@ class UserRecipeRelation(models.Model):
         Recipe,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         abstract = True
@@ -235,3 +402,75 @@ class ShoppingCart(UserRecipeRelation):
     class Meta(UserRecipeRelation.Meta):
         verbose_name = 'Рецепт в корзине'
         verbose_name_plural = 'Рецепты в корзине'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    published_at = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_user_recipe_timeline'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-published_at', '-recipe'),
+                name='timeline_user_published_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name='Рецепт'
+    )
+    neighbour = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbour_of',
+        verbose_name='Похожий рецепт'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('recipe', 'rank')
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'rank'),
+                name='unique_recipe_neighbour_rank'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.neighbour} похож на {self.recipe}'
@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .feed import batched, run_in_background
+from .ingredient_index import ingredient_index
+from .models import Recipe, Subscription, User
+from .signals import reset_counts, rows_purged
+
+
+def delete_rows(model, ids):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN '
+            f'({", ".join(["%s"] * len(ids))})',
+            ids
+        )
+
+
+def purge_where(model, **lookup):
+    rows = model._base_manager.filter(**lookup).order_by().values_list(
+        'pk', flat=True
+    )
+    while ids := list(rows[:settings.PURGE_BATCH_SIZE]):
+        purge(model, ids)
+
+
+def purge(model, ids):
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            if relation.through._meta.auto_created:
+                purge_where(relation.through, **{
+                    f'{relation.field.m2m_reverse_field_name()}__in': ids
+                })
+        elif relation.on_delete is models.CASCADE:
+            purge_where(relation.related_model, **{
+                f'{relation.field.name}__in': ids
+            })
+        elif relation.on_delete is models.SET_NULL:
+            relation.related_model._base_manager.filter(**{
+                f'{relation.field.name}__in': ids
+            }).update(**{relation.field.name: None})
+    for field in model._meta.many_to_many:
+        if field.remote_field.through._meta.auto_created:
+            purge_where(field.remote_field.through, **{
+                f'{field.m2m_field_name()}__in': ids
+            })
+    files = [
+        name
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+        for name in model._base_manager.filter(pk__in=ids).exclude(**{
+            field.attname: ''
+        }).values_list(field.attname, flat=True)
+        if name
+    ]
+    user_ids = []
+    if any(field.name == 'user' for field in model._meta.concrete_fields):
+        user_ids = sorted(set(model._base_manager.filter(
+            pk__in=ids
+        ).values_list('user_id', flat=True)))
+    delete_rows(model, ids)
+    if user_ids:
+        rows_purged.send(sender=model, user_ids=user_ids)
+    for batch in batched(files, settings.PURGE_BATCH_SIZE):
+        for name in batch:
+            default_storage.delete(name)
+
+
+def recount_followers(author_ids):
+    for batch in batched(author_ids, settings.PURGE_BATCH_SIZE):
+        User.objects.filter(pk__in=batch).update(followers_count=Coalesce(
+            Subquery(
+                Subscription.objects.filter(author=OuterRef('pk')).order_by()
+                .values('author').annotate(total=Count('id'))
+                .values('total')
+            ),
+            0
+        ))
+
+
+def purge_deleted():
+    recipes = Recipe.all_objects.filter(deleted_at__isnull=False)
+    while ids := list(recipes.order_by().values_list(
+        'pk', flat=True
+    )[:settings.PURGE_BATCH_SIZE]):
+        purge(Recipe, ids)
+    users = User.objects.filter(deleted_at__isnull=False)
+    while ids := list(users.order_by().values_list(
+        'pk', flat=True
+    )[:settings.PURGE_BATCH_SIZE]):
+        authors = set(Subscription.objects.filter(
+            user_id__in=ids
+        ).values_list('author_id', flat=True))
+        purge(User, ids)
+        recount_followers(sorted(authors - set(ids)))
+
+
+def delete_recipes(recipes):
+    ids = list(recipes.values_list('pk', flat=True))
+    Recipe.objects.filter(pk__in=ids).update(deleted_at=timezone.now())
+    ingredient_index.remove_recipes(ids)
+    reset_counts(Recipe)
+    run_in_background(purge_deleted)
+
+
+def delete_users(users):
+    ids = list(users.values_list('pk', flat=True))
+    now = timezone.now()
+    User.objects.filter(pk__in=ids).update(deleted_at=now, is_active=False)
+    recipe_ids = list(Recipe.objects.filter(author_id__in=ids).values_list(
+        'pk', flat=True
+    ))
+    Recipe.objects.filter(pk__in=recipe_ids).update(deleted_at=now)
+    ingredient_index.remove_recipes(recipe_ids)
+    Token.objects.filter(user_id__in=ids).delete()
+    reset_counts(User)
+    reset_counts(Recipe)
+    run_in_background(purge_deleted)
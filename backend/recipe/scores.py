@@ -0,0 +1,75 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from .models import Favorite, Recipe, ShoppingCart
+
+SCORE_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_exponent(created_at):
+    return (created_at - SCORE_EPOCH).total_seconds() / (
+        settings.TRENDING_HALF_LIFE_HOURS * 3600
+    )
+
+
+def trending_score(exponents):
+    if not exponents:
+        return 0.0
+    top = max(exponents)
+    return top + math.log2(
+        2 ** -top + sum(2 ** (exponent - top) for exponent in exponents)
+    )
+
+
+def compute_scores(recipe_ids):
+    popularity = dict.fromkeys(recipe_ids, 0.0)
+    exponents = defaultdict(list)
+    for model, weight in (
+        (Favorite, settings.SCORE_FAVORITE_WEIGHT),
+        (ShoppingCart, settings.SCORE_CART_WEIGHT),
+    ):
+        if weight <= 0:
+            continue
+        interactions = model.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'created_at')
+        for recipe_id, created_at in interactions.iterator():
+            popularity[recipe_id] += weight
+            exponents[recipe_id].append(
+                math.log2(weight) + decay_exponent(created_at)
+            )
+    return {
+        recipe_id: (popularity[recipe_id], trending_score(
+            exponents[recipe_id]
+        ))
+        for recipe_id in recipe_ids
+    }
+
+
+def refresh_scores(batch_size):
+    refreshed = 0
+    last_id = 0
+    while True:
+        recipe_ids = list(Recipe.objects.filter(
+            score_stale=True, pk__gt=last_id
+        ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not recipe_ids:
+            return refreshed
+        Recipe.objects.filter(pk__in=recipe_ids).update(score_stale=False)
+        Recipe.objects.bulk_update(
+            [
+                Recipe(
+                    pk=recipe_id,
+                    popularity=popularity,
+                    trending_score=trending
+                )
+                for recipe_id, (popularity, trending)
+                in compute_scores(recipe_ids).items()
+            ],
+            ['popularity', 'trending_score']
+        )
+        refreshed += len(recipe_ids)
+        last_id = recipe_ids[-1]
@@ -0,0 +1,198 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from core.cache import tiered_cache
+from .feed import backfill, fan_out, run_in_background
+from .ingredient_index import ingredient_index
+from .models import (
+    COUNTS_CACHE_NAMESPACE,
+    INGREDIENTS_CACHE_NAMESPACE,
+    SUBSCRIPTIONS_CACHE_NAMESPACE,
+    TAG_BITS_CACHE_KEY,
+    TAGS_CACHE_NAMESPACE,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Subscription,
+    Tag,
+    TimelineEntry,
+    User,
+    tag_bits_cache,
+)
+
+rows_purged = Signal()
+
+AUTHOR_FIELDS = {
+    'email', 'username', 'first_name', 'last_name', 'avatar'
+}
+
+
+def touch(recipes):
+    recipes.update(updated_at=timezone.now())
+
+
+def recipes_with_tag(bit):
+    return Recipe.objects.alias(
+        tag_hit=F('tags_mask').bitand(1 << bit)
+    ).filter(tag_hit__gt=0)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def sync_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.update_tags_mask()
+            touch(Recipe.objects.filter(pk=instance.pk))
+        return
+    bit = 1 << instance.bit
+    if action == 'post_add':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitor(bit), updated_at=timezone.now()
+        )
+    elif action == 'post_remove':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitand(~bit), updated_at=timezone.now()
+        )
+    elif action == 'pre_clear':
+        touch(recipes_with_tag(instance.bit))
+    elif action == 'post_clear':
+        recipes_with_tag(instance.bit).update(
+            tags_mask=F('tags_mask').bitand(~bit)
+        )
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_bit(sender, instance, **kwargs):
+    recipes_with_tag(instance.bit).update(
+        tags_mask=F('tags_mask').bitand(~(1 << instance.bit)),
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, created, **kwargs):
+    if not created:
+        touch(recipes_with_tag(instance.bit))
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        touch(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created, update_fields, **kwargs):
+    if not created and (
+        update_fields is None or AUTHOR_FIELDS & set(update_fields)
+    ):
+        touch(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_tag_bits(sender, **kwargs):
+    tag_bits_cache().delete(TAG_BITS_CACHE_KEY)
+    tiered_cache.invalidate(TAGS_CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def reset_ingredients(sender, **kwargs):
+    tiered_cache.invalidate(INGREDIENTS_CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def reset_subscriptions(sender, instance, **kwargs):
+    tiered_cache.invalidate(
+        SUBSCRIPTIONS_CACHE_NAMESPACE.format(instance.user_id)
+    )
+
+
+def reset_counts(model, user_id=None):
+    table = model._meta.db_table
+    tiered_cache.invalidate(COUNTS_CACHE_NAMESPACE.format(
+        table if user_id is None else f'{table}:{user_id}'
+    ))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def reset_recipe_counts(sender, **kwargs):
+    reset_counts(Recipe)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_counts(sender, created=True, **kwargs):
+    if created:
+        reset_counts(User)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def reset_membership_counts(sender, instance, **kwargs):
+    reset_counts(sender, instance.user_id)
+
+
+@receiver(rows_purged)
+def reset_purged_caches(sender, user_ids, **kwargs):
+    if sender not in (Favorite, ShoppingCart, Subscription):
+        return
+    for user_id in user_ids:
+        reset_counts(sender, user_id)
+        if sender is Subscription:
+            tiered_cache.invalidate(
+                SUBSCRIPTIONS_CACHE_NAMESPACE.format(user_id)
+            )
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_from_ingredient_index(sender, instance, **kwargs):
+    ingredient_index.remove_recipes([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_new_recipe(sender, instance, created, **kwargs):
+    if created:
+        run_in_background(fan_out, instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def mark_score_stale(sender, instance, created=True, **kwargs):
+    if created:
+        Recipe.objects.filter(
+            pk=instance.recipe_id, score_stale=False
+        ).update(score_stale=True)
+
+
+@receiver(post_save, sender=Subscription)
+def follow_author(sender, instance, created, **kwargs):
+    if not created:
+        return
+    User.objects.filter(pk=instance.author_id).update(
+        followers_count=F('followers_count') + 1
+    )
+    run_in_background(backfill, instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def unfollow_author(sender, instance, **kwargs):
+    User.objects.filter(
+        pk=instance.author_id, followers_count__gt=0
+    ).update(followers_count=F('followers_count') - 1)
+    TimelineEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id
+    ).delete()
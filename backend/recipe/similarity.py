@@ -0,0 +1,154 @@
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import (
+    Favorite,
+    IngredientInRecipe,
+    ShoppingCart,
+    SimilarRecipe,
+)
+
+CHUNK_SIZE = 10000
+FEATURE_KINDS = (
+    (Favorite, 'user_id', 'SIMILAR_FAVORITE_WEIGHT'),
+    (ShoppingCart, 'user_id', 'SIMILAR_CART_WEIGHT'),
+    (IngredientInRecipe, 'ingredient_id', 'SIMILAR_INGREDIENT_WEIGHT'),
+)
+
+
+def load_pairs(model, field):
+    return np.fromiter(
+        itertools.chain.from_iterable(
+            model.objects.order_by().values_list(
+                'recipe_id', field
+            ).iterator(chunk_size=CHUNK_SIZE)
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def compress(keys, size):
+    return np.argsort(keys, kind='stable'), np.concatenate((
+        [0], np.cumsum(np.bincount(keys, minlength=size))
+    ))
+
+
+class RecipeMatrix:
+    def __init__(self, max_feature_share):
+        recipes, features, weights = [], [], []
+        for kind, (model, field, weight_setting) in enumerate(FEATURE_KINDS):
+            pairs = load_pairs(model, field)
+            recipes.append(pairs[:, 0])
+            features.append(pairs[:, 1] * len(FEATURE_KINDS) + kind)
+            weights.append(np.full(
+                len(pairs), getattr(settings, weight_setting)
+            ))
+        self.recipe_ids, rows = np.unique(
+            np.concatenate(recipes), return_inverse=True
+        )
+        _, columns, frequency = np.unique(
+            np.concatenate(features), return_inverse=True, return_counts=True
+        )
+        weights = np.concatenate(weights) * np.log(
+            (len(self.recipe_ids) + 1) / frequency[columns]
+        )
+        kept = (frequency[columns] > 1) & (
+            frequency[columns] <= max(
+                2, max_feature_share * len(self.recipe_ids)
+            )
+        )
+        rows, columns, weights = rows[kept], columns[kept], weights[kept]
+        norms = np.sqrt(np.bincount(
+            rows, weights=weights ** 2, minlength=len(self.recipe_ids)
+        ))
+        values = weights / norms[rows]
+        order = np.lexsort((columns, rows))
+        self.rows, self.columns, self.values = (
+            rows[order], columns[order], values[order]
+        )
+        self.row_ptr = np.searchsorted(
+            self.rows, np.arange(len(self.recipe_ids) + 1)
+        )
+        column_order, self.column_ptr = compress(self.columns, len(frequency))
+        self.column_rows = self.rows[column_order]
+        self.column_values = self.values[column_order]
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def scores(self, start, stop):
+        first, last = self.row_ptr[start], self.row_ptr[stop]
+        columns = self.columns[first:last]
+        counts = self.column_ptr[columns + 1] - self.column_ptr[columns]
+        offsets = np.repeat(
+            self.column_ptr[columns] - np.cumsum(counts) + counts, counts
+        ) + np.arange(counts.sum())
+        scores = np.bincount(
+            np.repeat(self.rows[first:last] - start, counts) * len(self)
+            + self.column_rows[offsets],
+            weights=(
+                np.repeat(self.values[first:last], counts)
+                * self.column_values[offsets]
+            ),
+            minlength=(stop - start) * len(self)
+        ).reshape(stop - start, len(self))
+        scores[np.arange(stop - start), np.arange(start, stop)] = 0
+        return scores
+
+    def neighbours(self, start, stop, top_k):
+        scores = self.scores(start, stop)
+        limit = min(top_k, len(self) - 1)
+        if limit <= 0:
+            return
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        for row, candidates in enumerate(top):
+            candidates = candidates[scores[row, candidates] > 0]
+            candidates = candidates[np.lexsort((
+                -self.recipe_ids[candidates], -scores[row, candidates]
+            ))]
+            yield int(self.recipe_ids[start + row]), [
+                (int(self.recipe_ids[column]), float(scores[row, column]))
+                for column in candidates
+            ]
+
+
+def build_neighbours(top_k, memory_bytes, max_feature_share):
+    matrix = RecipeMatrix(max_feature_share)
+    if not len(matrix):
+        SimilarRecipe.objects.all().delete()
+        return 0
+    step = max(1, memory_bytes // (len(matrix) * 8))
+    for start in range(0, len(matrix), step):
+        stop = min(start + step, len(matrix))
+        rows = list(matrix.neighbours(start, stop, top_k))
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__in=[recipe_id for recipe_id, _ in rows]
+            ).delete()
+            SimilarRecipe.objects.bulk_create(
+                SimilarRecipe(
+                    recipe_id=recipe_id,
+                    neighbour_id=neighbour_id,
+                    rank=rank,
+                    score=score
+                )
+                for recipe_id, neighbours in rows
+                for rank, (neighbour_id, score) in enumerate(neighbours)
+            )
+    stale = np.setdiff1d(
+        np.fromiter(
+            SimilarRecipe.objects.order_by().values_list(
+                'recipe_id', flat=True
+            ).distinct().iterator(chunk_size=CHUNK_SIZE),
+            dtype=np.int64
+        ),
+        matrix.recipe_ids
+    )
+    for start in range(0, len(stale), CHUNK_SIZE):
+        SimilarRecipe.objects.filter(
+            recipe_id__in=stale[start:start + CHUNK_SIZE].tolist()
+        ).delete()
+    return len(matrix)
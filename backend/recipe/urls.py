@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import short_link_redirect
+from .views import short_link_redirect, short_link_redirect_async
 
 
 urlpatterns = [
-    path('s/<int:recipe_id>/', short_link_redirect, name='recipe-short-link'),
+    path(
+        's/<int:recipe_id>/',
+        short_link_redirect_async if settings.ASYNC_READ_VIEWS
+        else short_link_redirect,
+        name='recipe-short-link'
+    ),
 ]
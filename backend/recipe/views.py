@@ -1,10 +1,22 @@
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from rest_framework.exceptions import ValidationError
 
 from .models import Recipe
 
 
+def missing_recipe(recipe_id):
+    error = ValidationError(f'Рецепт с id {recipe_id} не найден.')
+    return JsonResponse(error.detail, status=error.status_code, safe=False)
+
+
 def short_link_redirect(request, recipe_id):
     if not Recipe.objects.filter(pk=recipe_id).exists():
-        raise ValidationError(f'Рецепт с id {recipe_id} не найден.')
+        return missing_recipe(recipe_id)
+    return redirect(f'/recipes/{recipe_id}/')
+
+
+async def short_link_redirect_async(request, recipe_id):
+    if not await Recipe.objects.filter(pk=recipe_id).aexists():
+        return missing_recipe(recipe_id)
     return redirect(f'/recipes/{recipe_id}/')